@@ -1,6 +1,9 @@
 from django.contrib import admin
 
-from .models import Category, Location, Post, Comment
+from .models import (
+    Category, Location, Post, Comment, ImageJob, OutboundEmail
+)
+from .moderation import set_comments_published
 
 admin.site.empty_value_display = 'Не задано'
 
@@ -28,6 +31,7 @@ class PostAdmin(admin.ModelAdmin):
         'category',
         'is_published',
         'created_at',
+        'comment_count',
     )
     list_editable = (
         'is_published',
@@ -48,7 +52,74 @@ class PostAdmin(admin.ModelAdmin):
         'is_published',
     )
     list_display_links = ('title',)
+    actions = ('hide_comments',)
+
+    @admin.action(description='Скрыть все комментарии к выбранным постам')
+    def hide_comments(self, request, queryset):
+        hidden = set_comments_published(
+            Comment.objects.filter(post__in=queryset), False
+        )
+        self.message_user(request, f'Скрыто комментариев: {hidden}')
 
 
 admin.site.register(Location)
-admin.site.register(Comment)
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    list_display = (
+        'text',
+        'post',
+        'author',
+        'created_at',
+        'is_published',
+    )
+    list_filter = ('is_published',)
+    list_select_related = ('post', 'author')
+    actions = ('hide', 'publish', 'hide_by_authors')
+
+    @admin.action(description='Скрыть выбранные комментарии')
+    def hide(self, request, queryset):
+        hidden = set_comments_published(queryset, False)
+        self.message_user(request, f'Скрыто комментариев: {hidden}')
+
+    @admin.action(description='Опубликовать выбранные комментарии')
+    def publish(self, request, queryset):
+        published = set_comments_published(queryset, True)
+        self.message_user(request, f'Опубликовано комментариев: {published}')
+
+    @admin.action(
+        description='Скрыть все комментарии авторов выбранных комментариев'
+    )
+    def hide_by_authors(self, request, queryset):
+        hidden = set_comments_published(
+            Comment.objects.filter(author__in=queryset.values('author')),
+            False,
+        )
+        self.message_user(request, f'Скрыто комментариев: {hidden}')
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'subject',
+        'created_at',
+        'attempts',
+        'next_attempt_at',
+        'sent_at',
+    )
+    list_filter = ('sent_at',)
+
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'source',
+        'post',
+        'status',
+        'attempts',
+        'worker',
+        'duration',
+        'finished_at',
+    )
+    list_filter = ('status',)
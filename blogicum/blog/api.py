@@ -0,0 +1,303 @@
+"""JSON API только для чтения: ленты, пост и его комментарии.
+
+Ленты берут выборки у HTML-представлений (главная, категория, профиль),
+поэтому видимость постов одинакова. Строки читаются через ``values()`` —
+только столбцы полей из ``?fields=`` и ключа сортировки — и кодируются
+без создания экземпляров моделей. Страницы листаются вперёд курсором
+``?cursor=`` по тому же ключу, что и лента в режиме ``'keyset'``;
+размер страницы — ``?limit=``, не больше ``BLOG_API_MAX_LIMIT``.
+
+Страница выбирается в представлении, внутри контекста реплики, а JSON
+отдаётся потоком по одному объекту. Генератор ответа к базе уже не
+обращается, поэтому его можно дочитывать после выхода из представления,
+в том числе под ASGI.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.paginator import InvalidPage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views import View
+
+from blog import views
+from blog.constants import NUMBER_OBJECTS_PER_PAGE
+from blog.mixins import (
+    FeedConditionalGetMixin, PostConditionalGetMixin, ReplicaReadMixin
+)
+from blog.models import Category, Comment, Post
+from blog.paginators import NEXT, KeysetPaginator
+
+User = get_user_model()
+
+_encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+dumps = _encoder.encode
+
+
+class Field:
+    """Поле ответа: столбцы ``values()`` и функция, строящая значение."""
+
+    def __init__(self, *lookups, value=None):
+        self.lookups = lookups
+        self.value = value or (lambda column: column)
+
+
+def _location(name, is_published):
+    # Как на страницах: название скрытого местоположения не выводится.
+    return name if is_published else None
+
+
+def _image(name):
+    return default_storage.url(name) if name else None
+
+
+POST_FIELDS = {
+    'id': Field('id'),
+    'title': Field('title'),
+    'text': Field('text'),
+    'pub_date': Field('pub_date'),
+    'author': Field('author__username'),
+    'category': Field('category__slug'),
+    'category_title': Field('category__title'),
+    'location': Field(
+        'location__name', 'location__is_published', value=_location
+    ),
+    'image': Field('image', value=_image),
+    'comment_count': Field('comment_count'),
+    'is_published': Field('is_published'),
+}
+COMMENT_FIELDS = {
+    'id': Field('id'),
+    'author': Field('author__username'),
+    'text': Field('text'),
+    'created_at': Field('created_at'),
+}
+
+
+class InvalidQuery(Exception):
+    """Некорректные параметры запроса: ответ 400."""
+
+
+class RowSerializer:
+    """Словари выбранных полей из строк ``values()``."""
+
+    def __init__(self, fields, names):
+        self.fields = [(name, fields[name]) for name in names]
+
+    @property
+    def lookups(self):
+        return tuple(dict.fromkeys(
+            lookup for _, field in self.fields for lookup in field.lookups
+        ))
+
+    def __call__(self, row):
+        return {
+            name: field.value(*(row[lookup] for lookup in field.lookups))
+            for name, field in self.fields
+        }
+
+
+class ApiView(View):
+    """Основа представлений API: поля, размер страницы, ошибки, поток."""
+
+    fields = POST_FIELDS
+    fields_kwarg = 'fields'
+    cursor_kwarg = 'cursor'
+    limit_kwarg = 'limit'
+
+    def get(self, request, *args, **kwargs):
+        try:
+            return self.respond()
+        except InvalidQuery as error:
+            return self.error(error, 400)
+        except Http404 as error:
+            return self.error(error, 404)
+
+    def error(self, error, status):
+        return JsonResponse(
+            {'detail': str(error)}, status=status,
+            json_dumps_params={'ensure_ascii': False},
+        )
+
+    def respond(self):
+        raise NotImplementedError('Определите respond() в представлении.')
+
+    def get_serializer(self, fields=None):
+        fields = fields or self.fields
+        raw = self.request.GET.get(self.fields_kwarg)
+        if not raw:
+            return RowSerializer(fields, fields)
+        names = list(dict.fromkeys(
+            name.strip() for name in raw.split(',') if name.strip()
+        ))
+        unknown = [name for name in names if name not in fields]
+        if unknown or not names:
+            raise InvalidQuery(
+                f'Неизвестные поля: {", ".join(unknown)}. Доступны:'
+                f' {", ".join(fields)}.'
+            )
+        return RowSerializer(fields, names)
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.GET.get(
+                self.limit_kwarg, NUMBER_OBJECTS_PER_PAGE
+            ))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= settings.BLOG_API_MAX_LIMIT:
+            raise InvalidQuery(
+                f'limit — целое число от 1 до {settings.BLOG_API_MAX_LIMIT}.'
+            )
+        return limit
+
+    def paginate(self, queryset, serialize, ordering, limit):
+        """Объекты страницы и курсор следующей (None на последней)."""
+        keys = tuple(name.lstrip('-') for name in ordering)
+        paginator = KeysetPaginator(
+            queryset.values(*dict.fromkeys(serialize.lookups + keys)),
+            limit, ordering,
+        )
+        try:
+            rows = list(paginator.forward(
+                self.request.GET.get(self.cursor_kwarg)
+            ))
+        except InvalidPage as error:
+            raise InvalidQuery(str(error))
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = paginator.encode_cursor(NEXT, rows[-1])
+        return map(serialize, rows), next_cursor
+
+    def stream(self, head, items, tail):
+        """Ответ потоком: ``head``, элементы массива через запятую, ``tail``.
+
+        Строки уже выбраны; кодируется по одному объекту за раз.
+        """
+        def chunks():
+            yield head
+            for index, item in enumerate(items):
+                yield f',{dumps(item)}' if index else dumps(item)
+            yield tail
+
+        return StreamingHttpResponse(
+            chunks(), content_type='application/json'
+        )
+
+    def stream_page(self, items, next_cursor):
+        return self.stream(
+            f'{{"next":{dumps(next_cursor)},"results":[', items, ']}'
+        )
+
+
+class ApiFeedView(ReplicaReadMixin, FeedConditionalGetMixin, ApiView):
+    """Лента постов: выборка и версия ленты — у HTML-представления."""
+
+    html_view_class = None
+    ordering = ('-pub_date', '-id')
+    page_kwarg = 'page'
+
+    def get_html_view(self):
+        view = self.html_view_class()
+        view.setup(self.request, *self.args, **self.kwargs)
+        return view
+
+    def get_feed_scope(self):
+        return self.get_html_view().get_feed_scope()
+
+    def get_etag_parts(self):
+        return (*super().get_etag_parts(), self.request.GET.urlencode())
+
+    def check_feed(self):
+        """Http404, если у ленты нет страницы (категория, профиль)."""
+
+    def respond(self):
+        self.check_feed()
+        items, next_cursor = self.paginate(
+            self.get_html_view().get_queryset(), self.get_serializer(),
+            self.ordering, self.get_limit(),
+        )
+        return self.stream_page(items, next_cursor)
+
+
+class ApiPostListView(ApiFeedView):
+    html_view_class = views.PostListView
+
+
+class ApiCategoryPostsView(ApiFeedView):
+    html_view_class = views.CategoryPostsListView
+
+    def check_feed(self):
+        if not Category.objects.filter(
+            slug=self.kwargs['category_slug'], is_published=True
+        ).exists():
+            raise Http404('Категория не найдена.')
+
+
+class ApiProfileView(ApiFeedView):
+    html_view_class = views.UserProfileListView
+
+    def check_feed(self):
+        if not User.objects.filter(
+            username=self.kwargs['username']
+        ).exists():
+            raise Http404('Пользователь не найден.')
+
+
+class ApiPostDetailView(ReplicaReadMixin, PostConditionalGetMixin, ApiView):
+    """Пост и первая страница его опубликованных комментариев."""
+
+    comment_ordering = ('created_at', 'id')
+
+    def can_read_from_replica(self):
+        # Автор видит и свои скрытые посты: только из основной базы.
+        return (
+            super().can_read_from_replica()
+            and not self.request.user.is_authenticated
+        )
+
+    def get_post(self, serialize):
+        """Строка поста, если он виден посетителю, как на его странице."""
+        row = Post.objects.filter(pk=self.kwargs[self.pk_url_kwarg]).values(
+            *serialize.lookups, 'author_id', 'is_published', 'pub_date',
+            'category__is_published',
+        ).first()
+        if row is None or (
+            row['author_id'] != self.request.user.pk and not (
+                row['is_published']
+                and row['category__is_published']
+                and row['pub_date'] <= timezone.now()
+            )
+        ):
+            raise Http404('Публикация не найдена.')
+        return row
+
+    def get_comments(self):
+        return self.paginate(
+            Comment.objects.filter(
+                post_id=self.kwargs[self.pk_url_kwarg], is_published=True
+            ),
+            RowSerializer(COMMENT_FIELDS, COMMENT_FIELDS),
+            self.comment_ordering,
+            self.get_limit(),
+        )
+
+    def respond(self):
+        serialize = self.get_serializer()
+        post = serialize(self.get_post(serialize))
+        comments, next_cursor = self.get_comments()
+        return self.stream(
+            f'{{"post":{dumps(post)},"comments_next":{dumps(next_cursor)},'
+            '"comments":[',
+            comments, ']}',
+        )
+
+
+class ApiPostCommentsView(ApiPostDetailView):
+    """Следующие страницы комментариев поста."""
+
+    def respond(self):
+        self.get_post(RowSerializer(POST_FIELDS, ('id',)))
+        return self.stream_page(*self.get_comments())
@@ -0,0 +1,56 @@
+"""Асинхронные версии представлений блога только для чтения.
+
+В Django 3.2 у ORM нет асинхронного API, поэтому асинхронное
+представление выполняет обычное в отдельном ограниченном пуле потоков
+``BLOG_ASYNC_VIEW_THREADS``. Под ASGI цикл событий при этом свободен:
+медленные клиенты не занимают потоки, а запросы к базе не конкурируют
+за общий поток ``sync_to_async`` с остальным синхронным кодом.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import update_wrapper
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from blog.db import check_reused_connections
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BLOG_ASYNC_VIEW_THREADS,
+            thread_name_prefix='blog-view',
+        )
+    return _executor
+
+
+def _run_in_worker(view, request, *args, **kwargs):
+    # Сигналы начала и конца запроса обрабатываются в другом потоке, а
+    # соединения с базой у каждого потока свои: проверяем их здесь.
+    close_old_connections()
+    check_reused_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def as_async_view(view_class, **initkwargs):
+    """Асинхронное представление поверх класса синхронного."""
+    view = view_class.as_view(**initkwargs)
+
+    async def async_view(request, *args, **kwargs):
+        run = sync_to_async(
+            _run_in_worker, thread_sensitive=False, executor=get_executor()
+        )
+        return await run(view, request, *args, **kwargs)
+
+    update_wrapper(async_view, view)
+    return async_view
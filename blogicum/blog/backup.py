@@ -0,0 +1,124 @@
+"""Потоковые выгрузка и загрузка данных блога в NDJSON.
+
+Каждая строка — один объект: ``{"model": ..., "pk": ..., "fields": ...}``,
+поля записываются по именам столбцов (``author_id``, а не ``author``).
+Модели идут в порядке зависимостей внешних ключей, поэтому загрузка
+проходит файл один раз и держит в памяти только текущий пакет.
+Связи многие-ко-многим пользователей (группы, права) не переносятся.
+"""
+import json
+from contextlib import contextmanager
+from datetime import date, time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.color import no_style
+from django.db import connection, reset_queries, transaction
+
+from blog.models import Category, Comment, Location, Post
+
+User = get_user_model()
+
+MODELS = (User, Category, Location, Post, Comment)
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+def _columns(model):
+    return [
+        field.attname for field in model._meta.concrete_fields
+        if not field.primary_key
+    ]
+
+
+def _encode_value(value):
+    # В отличие от DjangoJSONEncoder, даты пишутся с микросекундами.
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    raise TypeError(f'Значение {value!r} не сериализуется в JSON.')
+
+
+def export_rows(stream, chunk_size=2000):
+    """Пишет все объекты в поток; возвращает число строк по моделям."""
+    encoder = json.JSONEncoder(ensure_ascii=False, default=_encode_value)
+    written = {}
+    for model in MODELS:
+        label = _label(model)
+        columns = _columns(model)
+        rows = model.objects.order_by('pk').values_list('pk', *columns)
+        count = 0
+        for pk, *values in rows.iterator(chunk_size=chunk_size):
+            stream.write(encoder.encode({
+                'model': label,
+                'pk': pk,
+                'fields': dict(zip(columns, values)),
+            }))
+            stream.write('\n')
+            count += 1
+        written[label] = count
+    return written
+
+
+@contextmanager
+def _keep_auto_dates(models):
+    """Не даёт ``auto_now``/``auto_now_add`` затереть загружаемые даты."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def import_rows(stream, batch_size=2000, on_batch=None):
+    """Загружает объекты из потока с сохранением первичных ключей.
+
+    Строки одной модели копятся в пакет и записываются ``bulk_create``;
+    ``on_batch(model, created)`` вызывается после каждого пакета.
+    Возвращает число загруженных строк по моделям.
+    """
+    models = {_label(model): model for model in MODELS}
+    loaded = dict.fromkeys(models, 0)
+    model, batch = None, []
+
+    def flush():
+        if batch:
+            model.objects.bulk_create(batch)
+            loaded[_label(model)] += len(batch)
+            if on_batch:
+                on_batch(model, len(batch))
+            batch.clear()
+            # При DEBUG Django запоминает текст каждого запроса, а пакетные
+            # INSERT велики: без сброса память растёт с размером файла.
+            reset_queries()
+
+    with transaction.atomic(), _keep_auto_dates(MODELS):
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            row_model = models.get(record['model'])
+            if row_model is None:
+                raise ValueError(
+                    f'Строка {number}: неизвестная модель {record["model"]}.'
+                )
+            if row_model is not model or len(batch) >= batch_size:
+                flush()
+                model = row_model
+            batch.append(model(pk=record['pk'], **record['fields']))
+        flush()
+        # Как loaddata: счётчики первичных ключей продолжают загруженные.
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), MODELS):
+                cursor.execute(sql)
+    cache.clear()
+    return loaded
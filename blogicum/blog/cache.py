@@ -0,0 +1,101 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+INDEX_SCOPE = 'index'
+
+
+def category_scope(slug):
+    return f'category:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def post_scopes(post):
+    """Ленты, в которых может показываться пост."""
+    scopes = [INDEX_SCOPE, author_scope(post.author.username)]
+    if post.category_id:
+        scopes.append(category_scope(post.category.slug))
+    return scopes
+
+
+def scopes_for_posts(posts):
+    """Ленты, затрагиваемые изменением набора постов.
+
+    Одним запросом собирает различные категории и авторов постов;
+    главная лента затрагивается всегда.
+    """
+    scopes = {INDEX_SCOPE}
+    for slug, username in posts.order_by().values_list(
+        'category__slug', 'author__username'
+    ).distinct():
+        scopes.add(author_scope(username))
+        if slug is not None:
+            scopes.add(category_scope(slug))
+    return scopes
+
+
+def _version_key(scope):
+    return f'feed-version:{scope}'
+
+
+def scope_version(scope):
+    """Текущая версия ленты; входит в ключи всех её кэшированных данных.
+
+    Начальное значение — текущее время в наносекундах, чтобы после
+    вытеснения версии из кэша ключи не совпали со старыми.
+    """
+    key = _version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def _changed_key(scope):
+    return f'feed-changed:{scope}'
+
+
+def bump_scope(scope):
+    """Повышает версию ленты и возвращает новую.
+
+    При репликах ещё отмечает ленту изменённой на время возможного
+    отставания реплик (``DATABASE_REPLICA_PIN_SECONDS``).
+    """
+    if settings.DATABASE_REPLICAS:
+        cache.set(
+            _changed_key(scope), True,
+            settings.DATABASE_REPLICA_PIN_SECONDS,
+        )
+    try:
+        return cache.incr(_version_key(scope))
+    except ValueError:
+        version = time.time_ns()
+        cache.set(_version_key(scope), version, timeout=None)
+        return version
+
+
+def recently_changed(*scopes):
+    """Менялась ли какая-то из лент за время возможного отставания реплик."""
+    return bool(cache.get_many([_changed_key(scope) for scope in scopes]))
+
+
+def invalidate_scopes(*scopes):
+    """Инвалидирует все кэшированные данные перечисленных лент."""
+    for scope in set(scopes):
+        bump_scope(scope)
+
+
+def versioned_key(prefix, scope, *parts):
+    return ':'.join(
+        str(part) for part in (prefix, scope, scope_version(scope), *parts)
+    )
@@ -0,0 +1,209 @@
+"""Генерация синтетических данных блога для профилирования и бенчмарков.
+
+Объекты создаются через ``bulk_create`` пакетами с заранее назначенными
+первичными ключами: так связи строятся без повторного чтения из базы.
+Сигналы при этом не отправляются, поэтому после генерации счётчики
+комментариев пересчитываются, а кэш лент очищается.
+"""
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, reset_queries, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from blog.models import Category, Comment, Location, Post
+
+User = get_user_model()
+
+WORDS = (
+    'блог', 'город', 'путешествие', 'утро', 'вечер', 'река', 'гора',
+    'кофе', 'книга', 'музыка', 'поезд', 'море', 'лес', 'дорога', 'друг',
+    'проект', 'идея', 'код', 'день', 'ночь', 'зима', 'лето', 'фото',
+    'прогулка', 'рецепт', 'встреча', 'история', 'мост', 'парк', 'небо',
+)
+PUBLICATION_SPAN = timedelta(days=3 * 365)
+SCHEDULED_SPAN = timedelta(days=30)
+# Прагмы SQLite на время загрузки: без fsync и журнала на диске,
+# с крупным кэшем страниц (отрицательное значение — в КиБ).
+BULK_LOAD_PRAGMAS = {
+    'synchronous': 'OFF',
+    'journal_mode': 'MEMORY',
+    'cache_size': -256000,
+    'temp_store': 'MEMORY',
+}
+
+
+def _weights(rng, n):
+    """Накопленные веса с «длинным хвостом».
+
+    Немногие авторы, категории и посты получают большую часть записей,
+    как в реальных блогах.
+    """
+    return list(accumulate(rng.paretovariate(1.2) for _ in range(n)))
+
+
+@contextmanager
+def bulk_load_pragmas():
+    """Ускоряет массовую загрузку в SQLite и восстанавливает прагмы.
+
+    Сбой посреди загрузки может повредить базу, поэтому прагмы нужны
+    только для одноразовых наборов данных. Для других СУБД ничего не
+    меняется, как и внутри уже открытой транзакции: там SQLite не даёт
+    менять уровень надёжности.
+    """
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        yield
+        return
+    with connection.cursor() as cursor:
+        saved = {}
+        for name, value in BULK_LOAD_PRAGMAS.items():
+            saved[name] = cursor.execute(f'PRAGMA {name}').fetchone()[0]
+            cursor.execute(f'PRAGMA {name} = {value}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for name, value in saved.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def _batched_create(model, objects, batch_size, on_batch=None):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            _create_batch(model, batch, on_batch)
+            batch = []
+    if batch:
+        _create_batch(model, batch, on_batch)
+
+
+def _create_batch(model, batch, on_batch):
+    model.objects.bulk_create(batch)
+    # При DEBUG журнал запросов хранит огромные пакетные INSERT.
+    reset_queries()
+    if on_batch:
+        on_batch(model, len(batch))
+
+
+class DatasetGenerator:
+    """Генератор объектов блога с назначенными заранее ключами."""
+
+    # Непригодный пароль: входить под этими пользователями нельзя.
+    password = '!'
+
+    def __init__(self, users, categories, locations, posts, comments,
+                 seed=0):
+        if posts and not (users and categories):
+            raise ValueError(
+                'Для постов нужны хотя бы один автор и категория.'
+            )
+        self.rng = random.Random(seed)
+        self.now = timezone.now()
+        self.comment_total = comments
+        self.user_ids = self._ids(User, users)
+        self.category_ids = self._ids(Category, categories)
+        self.location_ids = self._ids(Location, locations)
+        self.post_ids = self._ids(Post, posts)
+        self.author_weights = _weights(self.rng, users)
+        self.category_weights = _weights(self.rng, categories)
+
+    @staticmethod
+    def _ids(model, count):
+        first = (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+        return range(first, first + count)
+
+    def _text(self, words):
+        return ' '.join(self.rng.choices(WORDS, k=words))
+
+    def _author(self):
+        return self.rng.choices(
+            self.user_ids, cum_weights=self.author_weights
+        )[0]
+
+    def users(self):
+        for pk in self.user_ids:
+            yield User(
+                pk=pk, username=f'user{pk}', password=self.password,
+                first_name=self.rng.choice(WORDS).title(),
+                last_name=self.rng.choice(WORDS).title(),
+                date_joined=self.now - self.rng.random() * PUBLICATION_SPAN,
+            )
+
+    def categories(self):
+        for pk in self.category_ids:
+            yield Category(
+                pk=pk, title=self._text(2).title(),
+                description=self._text(12), slug=f'category-{pk}',
+                is_published=self.rng.random() > 0.05,
+            )
+
+    def locations(self):
+        for pk in self.location_ids:
+            yield Location(
+                pk=pk, name=self._text(2).title(),
+                is_published=self.rng.random() > 0.05,
+            )
+
+    def posts(self):
+        rng = self.rng
+        for pk in self.post_ids:
+            if rng.random() < 0.01:
+                pub_date = self.now + rng.random() * SCHEDULED_SPAN
+            else:
+                pub_date = self.now - rng.random() * PUBLICATION_SPAN
+            location_id = None
+            if self.location_ids and rng.random() < 0.7:
+                location_id = rng.choice(self.location_ids)
+            yield Post(
+                pk=pk, title=self._text(4).capitalize(),
+                text=self._text(rng.randint(20, 200)),
+                pub_date=pub_date,
+                author_id=self._author(),
+                category_id=rng.choices(
+                    self.category_ids, cum_weights=self.category_weights
+                )[0],
+                location_id=location_id,
+                is_published=rng.random() > 0.05,
+            )
+
+    def comments(self):
+        if not self.post_ids or not self.user_ids:
+            return
+        post_weights = _weights(self.rng, len(self.post_ids))
+        for _ in range(self.comment_total):
+            yield Comment(
+                text=self._text(self.rng.randint(3, 40)),
+                post_id=self.rng.choices(
+                    self.post_ids, cum_weights=post_weights
+                )[0],
+                author_id=self._author(),
+            )
+
+
+def generate(users=100, categories=10, locations=20, posts=1000,
+             comments=5000, seed=0, batch_size=5000, on_batch=None):
+    """Создаёт набор данных заданного объёма.
+
+    Генерация детерминирована для одного ``seed`` и пустой базы.
+    ``on_batch(model, created)`` вызывается после каждого пакета.
+    """
+    generator = DatasetGenerator(
+        users, categories, locations, posts, comments, seed
+    )
+    with transaction.atomic():
+        for model, objects in (
+            (User, generator.users()),
+            (Category, generator.categories()),
+            (Location, generator.locations()),
+            (Post, generator.posts()),
+            (Comment, generator.comments()),
+        ):
+            _batched_create(model, objects, batch_size, on_batch)
+        Post.filt.sync_comment_count()
+    cache.clear()
@@ -0,0 +1,86 @@
+"""Настройка и учёт соединений с базой."""
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+_metrics_lock = threading.Lock()
+_metrics = dict.fromkeys(('opened', 'reused', 'health_check_failures'), 0)
+
+
+def _count(name):
+    with _metrics_lock:
+        _metrics[name] += 1
+
+
+def connection_metrics():
+    """Счётчики соединений текущего процесса-воркера."""
+    with _metrics_lock:
+        return {'pid': os.getpid(), **_metrics}
+
+
+def reset_connection_metrics():
+    with _metrics_lock:
+        for name in _metrics:
+            _metrics[name] = 0
+
+
+@receiver(connection_created)
+def count_opened_connection(sender, connection, **kwargs):
+    _count('opened')
+    logger.debug('Открыто соединение %s (pid %s)', connection.alias,
+                 os.getpid())
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Применяет ``settings.SQLITE_PRAGMAS`` к каждому новому соединению.
+
+    Режим WAL сохраняется в самом файле базы, остальные прагмы действуют
+    только в пределах соединения, поэтому задаются каждый раз.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(request_started)
+def check_reused_connections(**kwargs):
+    """Проверяет соединения, переданные из прошлых запросов.
+
+    Выполняется после ``close_old_connections``, который закрывает
+    соединения с истёкшим ``CONN_MAX_AGE``. Оставшиеся соединения могли
+    оборваться на стороне сервера базы; такие закрываются, и запрос
+    откроет новое вместо ошибки на первом же SQL.
+    """
+    for connection in connections.all():
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        if settings.DATABASE_HEALTH_CHECKS and not connection.is_usable():
+            _count('health_check_failures')
+            logger.warning('Соединение %s неработоспособно и закрыто',
+                           connection.alias)
+            connection.close()
+            continue
+        _count('reused')
+
+
+def copy_sqlite_database(source, target):
+    """Копирует базу ``source`` в ``target`` целиком через backup API.
+
+    Принимает соединения Django; годится, чтобы держать локальную
+    реплику-файл в актуальном состоянии.
+    """
+    for wrapper in (source, target):
+        wrapper.ensure_connection()
+    source.connection.backup(target.connection)
@@ -0,0 +1,140 @@
+"""Сводка изменений профилей для администраторов.
+
+Вместо письма на каждое изменение событие попадает в ограниченный буфер
+процесса, который пакетом сбрасывается в таблицу ``ProfileChangeEvent``:
+при заполнении, по возрасту старейшего события и при завершении процесса.
+Если запись в базу не удалась, события возвращаются в буфер (не больше
+``BLOG_DIGEST_BUFFER_SIZE`` самых новых) и сохраняются при следующем
+сбросе; ошибка пишется в журнал, а не в ответ на запрос.
+Команда ``send_profile_digest`` раз в окно собирает накопленные события в
+одно письмо каждому получателю и ставит его в очередь ``blog.mail``.
+"""
+import atexit
+import logging
+import threading
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import DatabaseError, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from blog.mail import enqueue_mail
+from blog.models import ProfileChangeEvent
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_buffer = []
+
+
+def _buffer_is_due(now):
+    max_age = timedelta(seconds=settings.BLOG_DIGEST_BUFFER_SECONDS)
+    return bool(_buffer) and (
+        len(_buffer) >= settings.BLOG_DIGEST_BUFFER_SIZE
+        or _buffer[0].created_at <= now - max_age
+    )
+
+
+def record_profile_change(user):
+    """Запоминает изменение профиля для ближайшей сводки."""
+    now = timezone.now()
+    with _lock:
+        _buffer.append(ProfileChangeEvent(
+            user_id=user.pk, username=user.username, created_at=now
+        ))
+        due = _buffer_is_due(now)
+    if due:
+        flush_buffer()
+
+
+def flush_buffer():
+    """Сохраняет события из буфера в базу одним запросом.
+
+    Возвращает число сохранённых событий.
+    """
+    with _lock:
+        events = _buffer[:]
+        _buffer.clear()
+    if not events:
+        return 0
+    try:
+        ProfileChangeEvent.objects.bulk_create(events)
+    except DatabaseError:
+        _restore(events)
+        logger.exception(
+            'Не удалось сохранить события профилей (%s), оставлены в буфере',
+            len(events),
+        )
+        return 0
+    return len(events)
+
+
+def _restore(events):
+    """Возвращает несохранённые события в начало буфера."""
+    with _lock:
+        _buffer[:0] = events
+        overflow = len(_buffer) - settings.BLOG_DIGEST_BUFFER_SIZE
+        if overflow > 0:
+            del _buffer[:overflow]
+    if overflow > 0:
+        logger.warning(
+            'Буфер событий профилей переполнен: потеряно %s', overflow
+        )
+
+
+def discard_buffer():
+    with _lock:
+        _buffer.clear()
+
+
+@receiver(request_finished)
+def flush_stale_buffer(**kwargs):
+    with _lock:
+        due = _buffer_is_due(timezone.now())
+    if due:
+        flush_buffer()
+
+
+@atexit.register
+def _flush_on_exit():
+    # Ошибка записи уже в журнале: при выходе событиям больше некуда деться.
+    flush_buffer()
+
+
+def compose_digest(events):
+    """Текст сводки: пользователи и число изменений профиля."""
+    changes = Counter(username for username, _ in events)
+    first = min(created_at for _, created_at in events)
+    last = max(created_at for _, created_at in events)
+    lines = [
+        f'Изменений профилей: {len(events)}'
+        f' ({first:%d.%m.%Y %H:%M} — {last:%d.%m.%Y %H:%M}).',
+        '',
+    ]
+    lines.extend(
+        f'{username}: {count}' for username, count in sorted(changes.items())
+    )
+    return '\n'.join(lines)
+
+
+def send_digests():
+    """Ставит в очередь по сводке каждому получателю; вернёт число событий."""
+    flush_buffer()
+    with transaction.atomic():
+        pending = ProfileChangeEvent.objects.order_by('pk')
+        events = list(pending.values_list('pk', 'username', 'created_at'))
+        if not events:
+            return 0
+        body = compose_digest([event[1:] for event in events])
+        for recipient in settings.BLOG_PROFILE_DIGEST_RECIPIENTS:
+            enqueue_mail(
+                subject='Profile changes digest',
+                message=body,
+                from_email=settings.BLOG_PROFILE_DIGEST_FROM,
+                recipient_list=[recipient],
+            )
+        pending.filter(pk__lte=events[-1][0]).delete()
+    return len(events)
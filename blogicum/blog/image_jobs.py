@@ -0,0 +1,198 @@
+"""Очередь обработки фото постов.
+
+Сохранение поста с новым фото только добавляет задание в таблицу
+``ImageJob`` (:func:`schedule_renditions`); уменьшенные варианты создаёт
+:func:`process_image_jobs` (команда ``process_image_jobs``) в пуле
+процессов. Пока задание не выполнено, шаблоны выводят оригинал.
+Рассчитано на один работающий обработчик очереди.
+"""
+import os
+from collections import defaultdict
+from time import perf_counter
+
+from django.conf import settings
+from django.utils import timezone
+
+from blog.cache import invalidate_scopes, post_scope, scopes_for_posts
+from blog.images import (
+    delete_renditions, render_renditions, renditions_are_stale
+)
+from blog.models import ImageJob, Post
+
+
+def enqueue_image_jobs(posts):
+    """Ставит в очередь фото постов ``[(pk, имя файла), ...]``.
+
+    Фото, которое уже ждёт обработки, второй раз не добавляется.
+    Возвращает число новых заданий.
+    """
+    posts = list(posts)
+    queued = set(ImageJob.objects.filter(
+        status=ImageJob.PENDING, post_id__in={pk for pk, _ in posts}
+    ).values_list('post_id', 'source'))
+    jobs = [
+        ImageJob(post_id=pk, source=source) for pk, source in posts
+        if (pk, source) not in queued
+    ]
+    ImageJob.objects.bulk_create(jobs)
+    return len(jobs)
+
+
+def schedule_renditions(post):
+    """Приводит варианты фото в соответствие с ``post.image``.
+
+    Новое фото ставится в очередь; если фото убрали, старые варианты
+    удаляются сразу — это не требует обработки изображений.
+    """
+    old = post.image_renditions or {}
+    if not renditions_are_stale(post.image.name, old):
+        return
+    if post.image:
+        enqueue_image_jobs([(post.pk, post.image.name)])
+        return
+    delete_renditions(old)
+    post.image_renditions = {}
+    Post.objects.filter(pk=post.pk).update(image_renditions={})
+
+
+def render_job(job):
+    """Выполняет задание ``(pk, имя файла)`` в процессе пула.
+
+    Работает только с файлами. Возвращает ``(pk, варианты, ошибка,
+    обработчик, время)``.
+    """
+    pk, source = job
+    started = perf_counter()
+    try:
+        renditions, error = render_renditions(source), ''
+    except Exception as exc:
+        # Повреждённое фото не должно останавливать весь пул.
+        renditions, error = None, f'{type(exc).__name__}: {exc}'
+    return pk, renditions, error, str(os.getpid()), perf_counter() - started
+
+
+class ImageJobStats:
+    """Пропускная способность обработчиков очереди фото."""
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.workers = defaultdict(
+            lambda: {'done': 0, 'failed': 0, 'busy_s': 0.0}
+        )
+
+    def add(self, worker, failed, seconds):
+        stats = self.workers[worker]
+        stats['failed' if failed else 'done'] += 1
+        stats['busy_s'] += seconds
+
+    def as_dict(self):
+        """Сводка: всего и по каждому процессу пула.
+
+        ``jobs_per_second`` обработчика считается по времени его работы,
+        ``utilization`` — доля этого времени от общей длительности.
+        """
+        elapsed = perf_counter() - self.started
+        workers = {}
+        for worker, stats in sorted(self.workers.items()):
+            jobs = stats['done'] + stats['failed']
+            busy = stats['busy_s']
+            workers[worker] = {
+                **stats,
+                'busy_s': round(busy, 3),
+                'jobs_per_second': round(jobs / busy, 2) if busy else None,
+                'utilization': round(busy / elapsed, 3) if elapsed else None,
+            }
+        done = sum(stats['done'] for stats in self.workers.values())
+        failed = sum(stats['failed'] for stats in self.workers.values())
+        return {
+            'done': done,
+            'failed': failed,
+            'elapsed_s': round(elapsed, 3),
+            'jobs_per_second': round((done + failed) / elapsed, 2),
+            'workers': workers,
+        }
+
+
+def _apply_renditions(rendered):
+    """Сохраняет варианты у постов, фото которых не успели сменить."""
+    current = {
+        pk: (image, renditions or {})
+        for pk, image, renditions in Post.objects.filter(
+            pk__in={post_id for post_id, _, _ in rendered}
+        ).values_list('pk', 'image', 'image_renditions')
+    }
+    updated = []
+    for post_id, source, renditions in rendered:
+        image, old = current.get(post_id, (None, {}))
+        if image != source or not Post.objects.filter(
+            pk=post_id, image=source
+        ).update(image_renditions=renditions):
+            # Пост удалён или фото заменено: варианты уже не нужны.
+            delete_renditions(renditions, keep=old)
+            continue
+        delete_renditions(old, keep=renditions)
+        current[post_id] = (image, renditions)
+        updated.append(post_id)
+    if updated:
+        invalidate_scopes(
+            *map(post_scope, updated),
+            *scopes_for_posts(Post.objects.filter(pk__in=updated)),
+        )
+
+
+def _finish_batch(jobs, results, stats):
+    by_pk = {job.pk: job for job in jobs}
+    rendered = []
+    for pk, renditions, error, worker, seconds in results:
+        job = by_pk[pk]
+        job.attempts += 1
+        job.worker = worker
+        job.duration = seconds
+        job.finished_at = timezone.now()
+        job.last_error = error
+        if error:
+            job.status = (
+                ImageJob.FAILED
+                if job.attempts >= settings.BLOG_IMAGE_JOB_MAX_ATTEMPTS
+                else ImageJob.PENDING
+            )
+        else:
+            job.status = ImageJob.DONE
+            rendered.append((job.post_id, job.source, renditions))
+        stats.add(worker, bool(error), seconds)
+    ImageJob.objects.bulk_update(jobs, (
+        'status', 'attempts', 'worker', 'duration', 'finished_at',
+        'last_error',
+    ))
+    _apply_renditions(rendered)
+
+
+def process_image_jobs(executor=None, batch_size=20, stats=None):
+    """Выполняет все задания очереди; возвращает ``ImageJobStats``.
+
+    Фото обрабатываются через ``executor.map`` (пул процессов), а без
+    него — в текущем процессе.
+    """
+    stats = stats or ImageJobStats()
+    run = executor.map if executor else map
+    # Задания, прерванные остановкой обработчика, выполняются заново.
+    ImageJob.objects.filter(status=ImageJob.PROCESSING).update(
+        status=ImageJob.PENDING
+    )
+    last_pk = 0
+    while True:
+        # Один проход по первичному ключу, как при отправке почты:
+        # неудачное задание повторяется при следующем запуске.
+        jobs = list(ImageJob.objects.filter(
+            status=ImageJob.PENDING, pk__gt=last_pk
+        ).order_by('pk')[:batch_size])
+        if not jobs:
+            return stats
+        last_pk = jobs[-1].pk
+        ImageJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=ImageJob.PROCESSING
+        )
+        _finish_batch(
+            jobs, run(render_job, [(job.pk, job.source) for job in jobs]),
+            stats,
+        )
@@ -0,0 +1,121 @@
+"""Уменьшенные варианты фото постов.
+
+Для каждой ширины из ``BLOG_IMAGE_WIDTHS`` (не больше исходной) и каждого
+формата из ``BLOG_IMAGE_FORMATS`` рядом с оригиналом сохраняется копия
+``<каталог>/renditions/<имя>_<ширина>.<расширение>``. Описание вариантов
+хранится в ``Post.image_renditions``::
+
+    {'source': 'post_images/photo.jpg', 'width': 1600, 'height': 1200,
+     'files': {'webp': {'320': 'post_images/renditions/photo_320.webp',
+                        ...},
+               'jpeg': {...}}}
+
+Варианты создаёт очередь обработки фото (``blog.image_jobs``).
+"""
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+MIME_TYPES = {'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+
+
+def rendition_name(name, width, image_format):
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(
+        directory, 'renditions',
+        f'{stem}_{width}.{EXTENSIONS[image_format]}'
+    )
+
+
+def rendition_widths(source_width, purpose=None):
+    """Ширины вариантов: для назначения или все, не шире оригинала."""
+    groups = (
+        [settings.BLOG_IMAGE_WIDTHS[purpose]] if purpose
+        else settings.BLOG_IMAGE_WIDTHS.values()
+    )
+    return sorted({
+        min(width, source_width) for group in groups for width in group
+    })
+
+
+def _encode(image, image_format):
+    if image_format == 'jpeg' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+    buffer = BytesIO()
+    image.save(
+        buffer, format=image_format.upper(),
+        quality=settings.BLOG_IMAGE_QUALITY, optimize=True,
+    )
+    return buffer.getvalue()
+
+
+def render_renditions(name, storage=default_storage):
+    """Создаёт варианты изображения ``name`` и возвращает их описание.
+
+    Не обращается к базе данных, поэтому годится для пула процессов.
+    """
+    with storage.open(name) as source, Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    width, height = image.size
+    files = {}
+    for target_width in rendition_widths(width):
+        resized = image
+        if target_width != width:
+            resized = image.resize(
+                (target_width, max(1, round(height * target_width / width))),
+                Image.LANCZOS, reducing_gap=3.0,
+            )
+        for image_format in settings.BLOG_IMAGE_FORMATS:
+            path = rendition_name(name, target_width, image_format)
+            storage.delete(path)
+            storage.save(path, ContentFile(_encode(resized, image_format)))
+            files.setdefault(image_format, {})[str(target_width)] = path
+    return {'source': name, 'width': width, 'height': height, 'files': files}
+
+
+def _paths(renditions):
+    return {
+        path for paths in renditions.get('files', {}).values()
+        for path in paths.values()
+    }
+
+
+def delete_renditions(renditions, keep=None, storage=default_storage):
+    """Удаляет файлы вариантов, кроме тех, что есть в ``keep``."""
+    for path in _paths(renditions) - _paths(keep or {}):
+        storage.delete(path)
+
+
+def renditions_are_stale(image_name, renditions):
+    return renditions.get('source') != (image_name or None)
+
+
+def picture_sources(renditions, purpose):
+    """Данные для ``<picture>``: источники по форматам и запасной JPEG."""
+    files = renditions.get('files', {})
+    widths = rendition_widths(renditions['width'], purpose)
+    sources = []
+    for image_format in settings.BLOG_IMAGE_FORMATS:
+        paths = files.get(image_format, {})
+        candidates = [
+            (default_storage.url(paths[str(width)]), width)
+            for width in widths if str(width) in paths
+        ]
+        if candidates:
+            sources.append({
+                'type': MIME_TYPES[image_format],
+                'srcset': ', '.join(
+                    f'{url} {width}w' for url, width in candidates
+                ),
+                'src': candidates[-1][0],
+            })
+    return sources, widths[-1] if widths else None
@@ -0,0 +1,97 @@
+"""Очередь исходящей почты.
+
+Письма сохраняются в таблицу ``OutboundEmail`` прямо в запросе, а
+доставляет их :func:`deliver_queued_mail` (команда ``send_queued_mail``):
+пакетами, через одно соединение с почтовым сервером на пакет, с
+повторными попытками и растущей паузой между ними. Рассчитано на один
+работающий обработчик очереди.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from blog.models import OutboundEmail
+
+
+def enqueue_mail(subject, message, from_email, recipient_list):
+    """Ставит письмо в очередь; вызывается вместо ``send_mail``."""
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email,
+        recipients=list(recipient_list),
+        next_attempt_at=timezone.now(),
+    )
+
+
+def pending_mail(now=None):
+    """Письма, которые пора отправить."""
+    return OutboundEmail.objects.filter(
+        sent_at__isnull=True,
+        attempts__lt=settings.BLOG_MAIL_MAX_ATTEMPTS,
+        next_attempt_at__lte=now or timezone.now(),
+    )
+
+
+def _retry_delay(attempts):
+    return timedelta(
+        seconds=settings.BLOG_MAIL_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+def _send_batch(emails, connection):
+    sent, failed = [], []
+    for email in emails:
+        message = EmailMessage(
+            email.subject, email.body, email.from_email, email.recipients,
+            connection=connection,
+        )
+        try:
+            message.send()
+        except Exception as error:
+            email.last_error = f'{type(error).__name__}: {error}'
+            failed.append(email)
+        else:
+            sent.append(email)
+    return sent, failed
+
+
+def deliver_queued_mail(batch_size=100):
+    """Отправляет все накопившиеся письма; возвращает (sent, failed)."""
+    total_sent = total_failed = 0
+    now = timezone.now()
+    last_pk = 0
+    while True:
+        # Один проход по первичному ключу: неудачное письмо не берётся
+        # повторно, даже если пауза перед новой попыткой нулевая.
+        emails = list(
+            pending_mail(now).filter(pk__gt=last_pk).order_by('pk')
+            [:batch_size]
+        )
+        if not emails:
+            break
+        last_pk = emails[-1].pk
+        connection = get_connection()
+        try:
+            connection.open()
+            sent, failed = _send_batch(emails, connection)
+        except Exception as error:
+            sent, failed = [], emails
+            for email in emails:
+                email.last_error = f'{type(error).__name__}: {error}'
+        finally:
+            connection.close()
+        OutboundEmail.objects.filter(
+            pk__in=[email.pk for email in sent]
+        ).update(sent_at=now)
+        for email in failed:
+            email.attempts += 1
+            email.next_attempt_at = now + _retry_delay(email.attempts)
+        OutboundEmail.objects.bulk_update(
+            failed, ('attempts', 'next_attempt_at', 'last_error')
+        )
+        total_sent += len(sent)
+        total_failed += len(failed)
+    return total_sent, total_failed
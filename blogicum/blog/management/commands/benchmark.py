@@ -0,0 +1,337 @@
+import json
+import platform
+import statistics
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+from itertools import cycle
+from time import perf_counter
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import (
+    DatabaseError, close_old_connections, connection, connections
+)
+from django.db.models import Count, Q
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from blog import datagen
+from blog.db import connection_metrics, reset_connection_metrics
+from blog.models import Category, Comment, Location, Post
+
+User = get_user_model()
+
+HTML_ENDPOINTS = ('index', 'category', 'profile', 'post_detail')
+# Те же данные в JSON API: сравнение с HTML-страницами.
+API_ENDPOINTS = tuple(f'api_{name}' for name in HTML_ENDPOINTS)
+READ_ENDPOINTS = HTML_ENDPOINTS + API_ENDPOINTS
+WRITE_ENDPOINTS = ('comment_add', 'post_create')
+ENDPOINTS = READ_ENDPOINTS + WRITE_ENDPOINTS
+# Поведение SQLite по умолчанию для сравнения с settings.SQLITE_PRAGMAS.
+BASELINE_SQLITE_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+
+def conn_max_age(value):
+    return None if value.lower() == 'none' else int(value)
+
+
+def summarize(latencies, elapsed, errors):
+    """Сводка замеров одной точки входа; время в миллисекундах."""
+    ms = sorted(latency * 1000 for latency in latencies)
+    percentiles = statistics.quantiles(ms, n=100, method='inclusive')
+    return {
+        'requests': len(ms),
+        'errors': errors,
+        'rps': round(len(ms) / elapsed, 2),
+        'mean_ms': round(statistics.fmean(ms), 3),
+        'min_ms': round(ms[0], 3),
+        'p50_ms': round(percentiles[49], 3),
+        'p95_ms': round(percentiles[94], 3),
+        'p99_ms': round(percentiles[98], 3),
+        'max_ms': round(ms[-1], 3),
+    }
+
+
+class Targets:
+    """Объекты, к которым обращается бенчмарк.
+
+    Самая наполненная опубликованная категория, самый активный автор
+    и выборка видимых постов.
+    """
+
+    def __init__(self, sample_size):
+        visible = Post.objects.filter(
+            is_published=True,
+            category__is_published=True,
+            pub_date__lte=timezone.now(),
+        )
+        self.category = Category.objects.filter(is_published=True).annotate(
+            total=Count('posts', filter=Q(posts__in=visible))
+        ).order_by('-total').first()
+        self.author = User.objects.annotate(
+            total=Count('posts')
+        ).order_by('-total').first()
+        self.post_ids = list(
+            visible.order_by('-pub_date').values_list('pk', flat=True)
+            [:sample_size]
+        )
+        if not (self.category and self.author and self.post_ids):
+            raise CommandError(
+                'В базе нет опубликованных постов: запустите бенчмарк'
+                ' с --generate или загрузите данные.'
+            )
+        self.location = Location.objects.filter(is_published=True).first()
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет задержку (p50/p95/p99) и пропускную способность страниц'
+        ' блога через тестовый клиент Django и выводит результат в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Число замеряемых запросов на точку входа.')
+        parser.add_argument('--warmup', type=int, default=10,
+                            help='Число прогревочных запросов.')
+        parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS,
+                            default=ENDPOINTS)
+        parser.add_argument(
+            '--authenticated', action='store_true',
+            help='Читающие запросы от имени пользователя: без кэша'
+                 ' анонимных страниц.'
+        )
+        parser.add_argument('--sample', type=int, default=100,
+                            help='Сколько разных постов открывать.')
+        parser.add_argument('--output', help='Файл для JSON; иначе stdout.')
+        parser.add_argument(
+            '--writers', type=int, default=0,
+            help='Число потоков, параллельно добавляющих комментарии.'
+        )
+        parser.add_argument(
+            '--write-interval', type=float, default=0.05,
+            help='Пауза писателя между комментариями, с: одинаковая'
+                 ' нагрузка записью при сравнении профилей SQLite.'
+        )
+        parser.add_argument(
+            '--sqlite-profile', choices=('settings', 'baseline'),
+            default='settings',
+            help='Прагмы SQLite: из settings.SQLITE_PRAGMAS или'
+                 ' умолчания SQLite (журнал DELETE) для сравнения.'
+        )
+        parser.add_argument(
+            '--conn-max-age', type=conn_max_age,
+            help='CONN_MAX_AGE на время замера (секунды или none);'
+                 ' по умолчанию из настроек базы.'
+        )
+        parser.add_argument(
+            '--generate', action='store_true',
+            help='Перед замером сгенерировать данные (см. параметры ниже).'
+        )
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--locations', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2:
+            raise CommandError('Нужно хотя бы два замеряемых запроса.')
+        if options['generate']:
+            datagen.generate(
+                users=options['users'],
+                categories=options['categories'],
+                locations=options['locations'],
+                posts=options['posts'],
+                comments=options['comments'],
+                seed=options['seed'],
+            )
+        targets = Targets(options['sample'])
+        pragmas = settings.SQLITE_PRAGMAS
+        if options['sqlite_profile'] == 'baseline':
+            pragmas = BASELINE_SQLITE_PRAGMAS
+        # Прагмы применяются при открытии соединения: переоткрываем.
+        connections.close_all()
+        with override_settings(DEBUG=False, SQLITE_PRAGMAS=pragmas), \
+                self.conn_max_age(options['conn_max_age']):
+            results = {
+                name: self.run_endpoint(name, targets, options)
+                for name in options['endpoints']
+            }
+        connections.close_all()
+        meta = self.meta(options)
+        meta['sqlite_pragmas'] = pragmas
+        meta['conn_max_age'] = (
+            options['conn_max_age']
+            if options['conn_max_age'] is not None
+            else connection.settings_dict['CONN_MAX_AGE']
+        )
+        report = {'meta': meta, 'results': results}
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fh:
+                fh.write(output)
+        else:
+            self.stdout.write(output)
+
+    @contextmanager
+    def conn_max_age(self, value):
+        """Временно меняет CONN_MAX_AGE всех баз."""
+        if value is None:
+            yield
+            return
+        saved = {
+            alias: connections.databases[alias]['CONN_MAX_AGE']
+            for alias in connections
+        }
+        for alias in saved:
+            connections.databases[alias]['CONN_MAX_AGE'] = value
+        try:
+            yield
+        finally:
+            connections.close_all()
+            for alias, max_age in saved.items():
+                connections.databases[alias]['CONN_MAX_AGE'] = max_age
+
+    def make_client(self, targets, authenticated):
+        client = Client(SERVER_NAME='localhost')
+        if authenticated:
+            client.force_login(targets.author)
+        return client
+
+    def requests_for(self, name, targets):
+        """Бесконечный поток (метод, адрес, данные) для точки входа."""
+        posts = cycle(targets.post_ids)
+        prefix = ''
+        if name in API_ENDPOINTS:
+            prefix, name = '/api', name[len('api_'):]
+        if name == 'index':
+            url = f'{prefix}/posts/' if prefix else '/'
+            return cycle([('get', url, None)])
+        if name == 'category':
+            url = f'{prefix}/category/{targets.category.slug}/'
+            return cycle([('get', url, None)])
+        if name == 'profile':
+            url = f'{prefix}/profile/{targets.author.username}/'
+            return cycle([('get', url, None)])
+        if name == 'post_detail':
+            return (('get', f'{prefix}/posts/{pk}/', None) for pk in posts)
+        if name == 'comment_add':
+            return (
+                ('post', f'/posts/{pk}/comment/', {'text': 'Бенчмарк'})
+                for pk in posts
+            )
+        return cycle([('post', '/posts/create/', {
+            'title': 'Бенчмарк',
+            'text': 'Текст поста из бенчмарка.',
+            'pub_date': timezone.now().strftime('%Y-%m-%dT%H:%M'),
+            'category': targets.category.pk,
+            'location': targets.location.pk if targets.location else '',
+            'is_published': 'on',
+        })])
+
+    def sender(self, name, targets, authenticated):
+        """Функция, отправляющая очередной запрос; вернёт успех."""
+        client = self.make_client(targets, authenticated)
+        requests = self.requests_for(name, targets)
+
+        def send():
+            method, url, data = next(requests)
+            # Тестовый клиент отключает close_old_connections; как
+            # WSGIHandler, закрываем устаревшие соединения до и после
+            # запроса, иначе CONN_MAX_AGE не влиял бы на замер.
+            close_old_connections()
+            try:
+                response = getattr(client, method)(url, data or {})
+                if response.streaming:
+                    # Тело потокового ответа формируется при чтении.
+                    b''.join(response.streaming_content)
+            except DatabaseError:
+                # «database is locked» после истечения busy_timeout.
+                return False
+            finally:
+                close_old_connections()
+            return response.status_code < 400
+
+        return send
+
+    @contextmanager
+    def concurrent_writers(self, targets, count, interval):
+        """Фоновые потоки, без паузы добавляющие комментарии."""
+        stop = threading.Event()
+        written = []
+
+        def write():
+            send = self.sender('comment_add', targets, authenticated=True)
+            done = 0
+            try:
+                while not stop.wait(interval):
+                    done += send()
+            finally:
+                written.append(done)
+                connection.close()
+
+        threads = [threading.Thread(target=write) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        try:
+            yield written
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def run_endpoint(self, name, targets, options):
+        authenticated = options['authenticated'] or name in WRITE_ENDPOINTS
+        send = self.sender(name, targets, authenticated)
+        for _ in range(options['warmup']):
+            send()
+        latencies = []
+        errors = 0
+        reset_connection_metrics()
+        with self.concurrent_writers(
+            targets, options['writers'], options['write_interval']
+        ) as written:
+            started = perf_counter()
+            for _ in range(options['requests']):
+                request_started = perf_counter()
+                errors += not send()
+                latencies.append(perf_counter() - request_started)
+            elapsed = perf_counter() - started
+        result = summarize(latencies, elapsed, errors)
+        result['connections'] = connection_metrics()
+        if options['writers']:
+            result['concurrent_writes'] = sum(written)
+            result['concurrent_writes_per_second'] = round(
+                sum(written) / elapsed, 2
+            )
+        self.stderr.write(
+            f'{name}: p50 {result["p50_ms"]} мс, p99 {result["p99_ms"]} мс,'
+            f' {result["rps"]} запросов/с'
+        )
+        return result
+
+    def meta(self, options):
+        return {
+            'timestamp': datetime.now(dt_timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'platform': sys.platform,
+            'database': connection.vendor,
+            'cache': settings.CACHES['default']['BACKEND'],
+            'feed_pagination': settings.BLOG_FEED_PAGINATION,
+            'authenticated_reads': options['authenticated'],
+            'writers': options['writers'],
+            'dataset': {
+                'users': User.objects.count(),
+                'categories': Category.objects.count(),
+                'locations': Location.objects.count(),
+                'posts': Post.objects.count(),
+                'comments': Comment.objects.count(),
+            },
+        }
@@ -0,0 +1,36 @@
+import gzip
+
+from django.core.management.base import BaseCommand
+
+from blog.backup import export_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает пользователей, категории, местоположения, посты'
+        ' и комментарии в NDJSON (файл .gz сжимается).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', nargs='?', default='-',
+                            help='Путь к файлу; по умолчанию stdout.')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options['output']
+        if path == '-':
+            # Строки уже заканчиваются переводом строки, как в dumpdata.
+            self.stdout.ending = None
+            written = export_rows(self.stdout, options['chunk_size'])
+        else:
+            if path.endswith('.gz'):
+                # Быстрый уровень сжатия: на максимальном выгрузка
+                # упирается в gzip, а не в базу.
+                stream = gzip.open(path, 'wt', compresslevel=1,
+                                   encoding='utf-8')
+            else:
+                stream = open(path, 'w', encoding='utf-8')
+            with stream:
+                written = export_rows(stream, options['chunk_size'])
+        for label, count in written.items():
+            self.stderr.write(f'{label}: {count}')
@@ -0,0 +1,72 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import datagen
+
+
+class Command(BaseCommand):
+    help = (
+        'Быстро создаёт синтетические данные блога заданного объёма:'
+        ' пакетный bulk_create в транзакции, детерминированный seed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--locations', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=1000000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--safe', action='store_true',
+            help='Не отключать журнал и fsync SQLite на время загрузки.'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пакета должен быть положительным.')
+        totals = {
+            'user': options['users'],
+            'category': options['categories'],
+            'location': options['locations'],
+            'post': options['posts'],
+            'comment': options['comments'],
+        }
+        created = dict.fromkeys(totals, 0)
+        started = perf_counter()
+
+        def report(model, count):
+            name = model._meta.model_name
+            created[name] += count
+            self.stderr.write(
+                f'{model._meta.verbose_name_plural}:'
+                f' {created[name]}/{totals[name]}'
+                f' ({perf_counter() - started:.1f} с)'
+            )
+
+        generate_options = {
+            'users': options['users'],
+            'categories': options['categories'],
+            'locations': options['locations'],
+            'posts': options['posts'],
+            'comments': options['comments'],
+            'seed': options['seed'],
+            'batch_size': options['batch_size'],
+            'on_batch': report,
+        }
+        try:
+            if options['safe']:
+                datagen.generate(**generate_options)
+            else:
+                with datagen.bulk_load_pragmas():
+                    datagen.generate(**generate_options)
+        except ValueError as error:
+            raise CommandError(error)
+        elapsed = perf_counter() - started
+        rows = sum(created.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано строк: {rows} за {elapsed:.1f} с'
+            f' ({rows / elapsed * 60:,.0f} в минуту)'.replace(',', ' ')
+        ))
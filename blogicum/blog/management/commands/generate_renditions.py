@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from blog.image_jobs import enqueue_image_jobs
+from blog.images import renditions_are_stale
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Ставит в очередь обработки фото существующих постов без'
+        ' актуальных уменьшенных вариантов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Пересоздать и актуальные варианты.')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Сколько постов ставить в очередь за раз.')
+
+    def handle(self, *args, **options):
+        queued, batch = 0, []
+        for pk, name, renditions in Post.objects.exclude(image='').values_list(
+            'pk', 'image', 'image_renditions'
+        ).iterator():
+            if options['all'] or renditions_are_stale(name, renditions):
+                batch.append((pk, name))
+            if len(batch) >= options['batch_size']:
+                queued += enqueue_image_jobs(batch)
+                batch = []
+        queued += enqueue_image_jobs(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Поставлено в очередь фото: {queued}. Обработайте их командой'
+            ' process_image_jobs.'
+        ))
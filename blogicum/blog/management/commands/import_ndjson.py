@@ -0,0 +1,40 @@
+import gzip
+import sys
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from blog.backup import import_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает NDJSON, выгруженный export_ndjson, пакетами'
+        ' bulk_create с сохранением первичных ключей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='Путь к файлу или «-» для stdin.')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def load(self, stream, batch_size):
+        try:
+            return import_rows(stream, batch_size)
+        except (ValueError, KeyError, IntegrityError) as error:
+            raise CommandError(f'Загрузка отменена: {error}')
+
+    def handle(self, *args, **options):
+        path = options['input']
+        started = perf_counter()
+        if path == '-':
+            loaded = self.load(sys.stdin, options['batch_size'])
+        else:
+            opener = gzip.open if path.endswith('.gz') else open
+            with opener(path, 'rt', encoding='utf-8') as stream:
+                loaded = self.load(stream, options['batch_size'])
+        total = sum(loaded.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено объектов: {total}'
+            f' за {perf_counter() - started:.1f} с'
+        ))
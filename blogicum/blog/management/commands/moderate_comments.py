@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.models import Comment
+from blog.moderation import set_comments_published
+
+
+class Command(BaseCommand):
+    help = (
+        'Скрывает или снова публикует все комментарии пользователя или'
+        ' поста одним UPDATE.'
+    )
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--author', help='Имя пользователя.')
+        target.add_argument('--post', type=int, help='Идентификатор поста.')
+        parser.add_argument('--publish', action='store_true',
+                            help='Опубликовать вместо того, чтобы скрыть.')
+
+    def handle(self, *args, **options):
+        if options['author'] is not None:
+            User = get_user_model()
+            if not User.objects.filter(username=options['author']).exists():
+                raise CommandError(
+                    f'Пользователь {options["author"]} не найден.'
+                )
+            comments = Comment.objects.filter(
+                author__username=options['author']
+            )
+        else:
+            comments = Comment.objects.filter(post_id=options['post'])
+        changed = set_comments_published(comments, options['publish'])
+        action = 'Опубликовано' if options['publish'] else 'Скрыто'
+        self.stdout.write(
+            self.style.SUCCESS(f'{action} комментариев: {changed}')
+        )
@@ -0,0 +1,70 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from blog.image_jobs import ImageJobStats, process_image_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт уменьшенные варианты фото из очереди в пуле процессов и'
+        ' выводит пропускную способность обработчиков.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Число процессов пула.')
+        parser.add_argument('--batch-size', type=int, default=20,
+                            help='Сколько заданий брать из очереди за раз.')
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, проверяя очередь каждые --interval с.'
+        )
+        parser.add_argument('--interval', type=float, default=5)
+        parser.add_argument('--json', action='store_true',
+                            help='Вывести метрики в JSON.')
+
+    def handle(self, *args, **options):
+        # Дочерние процессы работают только с файлами; соединения с базой
+        # не должны достаться им по наследству, поэтому пул запускается
+        # сразу, пока соединения закрыты.
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=options['workers'], initializer=django.setup
+        ) as executor:
+            executor.submit(os.getpid).result()
+            stats = ImageJobStats()
+            reported = 0
+            while True:
+                process_image_jobs(executor, options['batch_size'], stats)
+                metrics = stats.as_dict()
+                total = metrics['done'] + metrics['failed']
+                if total > reported or not options['loop']:
+                    self.report(metrics, options['json'])
+                    reported = total
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+
+    def report(self, metrics, as_json):
+        if as_json:
+            self.stdout.write(json.dumps(metrics, ensure_ascii=False))
+            return
+        for worker, stats in metrics['workers'].items():
+            self.stdout.write(
+                f'Обработчик {worker}: готово {stats["done"]},'
+                f' с ошибкой {stats["failed"]},'
+                f' {stats["jobs_per_second"]} фото/с,'
+                f' загрузка {stats["utilization"]:.0%}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано фото: {metrics["done"]},'
+            f' с ошибкой: {metrics["failed"]}'
+            f' за {metrics["elapsed_s"]} с'
+            f' ({metrics["jobs_per_second"]} фото/с)'
+        ))
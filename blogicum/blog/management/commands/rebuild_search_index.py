@@ -0,0 +1,49 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from blog.search import check_index, rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново заполняет полнотекстовый индекс постов (SQLite FTS5),'
+        ' читая посты пакетами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=10000,
+                            help='Сколько постов индексировать за раз.')
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только проверить, что индекс совпадает с таблицей постов.'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('Размер пакета должен быть положительным.')
+        started = perf_counter()
+        if options['check']:
+            try:
+                check_index()
+            except DatabaseError as error:
+                raise CommandError(f'Индекс повреждён: {error}')
+            self.stdout.write(self.style.SUCCESS('Индекс в порядке.'))
+            return
+
+        def report(indexed):
+            self.stderr.write(
+                f'Проиндексировано постов: {indexed}'
+                f' ({perf_counter() - started:.1f} с)'
+            )
+
+        indexed = rebuild_index(options['chunk_size'], on_chunk=report)
+        if indexed is None:
+            raise CommandError(
+                'Полнотекстовый индекс доступен только в SQLite с FTS5.'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано постов: {indexed}'
+            f' за {perf_counter() - started:.1f} с'
+        ))
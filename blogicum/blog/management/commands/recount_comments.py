@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Сверяет сохранённые счётчики комментариев с фактическими.'
+
+    def handle(self, *args, **options):
+        fixed = Post.filt.sync_comment_count()
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено счётчиков: {fixed}')
+        )
@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.digest import send_digests
+
+
+class Command(BaseCommand):
+    help = (
+        'Собирает накопленные изменения профилей в одно письмо каждому'
+        ' получателю и ставит его в очередь исходящей почты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, отправляя сводку раз в'
+                 ' BLOG_DIGEST_WINDOW секунд.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            events = send_digests()
+            self.stdout.write(f'Событий в сводке: {events}')
+            if not options['loop']:
+                break
+            time.sleep(settings.BLOG_DIGEST_WINDOW)
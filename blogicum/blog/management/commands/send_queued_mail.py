@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.mail import deliver_queued_mail
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из очереди исходящей почты пакетами через одно'
+        ' соединение; неудачные повторяются с растущей паузой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, проверяя очередь каждые --interval с.'
+        )
+        parser.add_argument('--interval', type=float, default=5)
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = deliver_queued_mail(options['batch_size'])
+            if sent or failed or not options['loop']:
+                self.stdout.write(
+                    f'Отправлено: {sent}, с ошибкой: {failed}'
+                )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
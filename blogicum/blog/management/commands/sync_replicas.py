@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from blog.db import copy_sqlite_database
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite во все реплики DATABASE_REPLICAS'
+        ' для локальной проверки чтения с реплик.'
+    )
+
+    def handle(self, *args, **options):
+        primary = connections['default']
+        if primary.vendor != 'sqlite':
+            raise CommandError('Команда копирует только базы SQLite.')
+        for alias in settings.DATABASE_REPLICAS:
+            replica = connections[alias]
+            copy_sqlite_database(primary, replica)
+            self.stdout.write(f'{alias}: {replica.settings_dict["NAME"]}')
@@ -0,0 +1,27 @@
+from django.conf import settings
+
+from blog.routers import PIN_COOKIE
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class PrimaryPinMiddleware:
+    """Закрепляет за пользователем основную базу после записи.
+
+    На ответ любого небезопасного запроса ставится короткоживущая cookie;
+    пока она есть, ``ReplicaReadMixin`` не читает с реплик, и после
+    редиректа, например из ``add_comment``, автор видит свой комментарий.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if settings.DATABASE_REPLICAS and request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
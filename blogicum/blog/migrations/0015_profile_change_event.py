@@ -0,0 +1,28 @@
+# Generated by Django 3.2.16 on 2026-10-18 06:28
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_outbound_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.BigIntegerField(verbose_name='Пользователь')),
+                ('username', models.CharField(max_length=150, verbose_name='Имя пользователя')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Изменено')),
+            ],
+            options={
+                'verbose_name': 'изменение профиля',
+                'verbose_name_plural': 'Изменения профилей',
+                'ordering': ('created_at',),
+            },
+        ),
+    ]
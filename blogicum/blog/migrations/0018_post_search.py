@@ -0,0 +1,84 @@
+import sqlite3
+from contextlib import closing
+
+from django.db import migrations
+
+# Полнотекстовый индекс постов (см. blog.search): внешнее содержимое из
+# blog_post, синхронизация триггерами, префиксные индексы для поиска
+# по началу слова. Для других СУБД и SQLite без FTS5 миграция ничего не
+# делает, а поиск работает через icontains.
+CREATE_SQL = (
+    """
+    CREATE VIRTUAL TABLE blog_post_fts USING fts5(
+        title, text,
+        content='blog_post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER blog_post_fts_insert AFTER INSERT ON blog_post BEGIN
+        INSERT INTO blog_post_fts (rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_post_fts_delete AFTER DELETE ON blog_post BEGIN
+        INSERT INTO blog_post_fts (blog_post_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_post_fts_update AFTER UPDATE OF title, text
+    ON blog_post BEGIN
+        INSERT INTO blog_post_fts (blog_post_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO blog_post_fts (rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    # Совпадение в заголовке весит в десять раз больше, чем в тексте.
+    "INSERT INTO blog_post_fts (blog_post_fts, rank)"
+    " VALUES ('rank', 'bm25(10.0, 1.0)')",
+    "INSERT INTO blog_post_fts (blog_post_fts) VALUES ('rebuild')",
+)
+DROP_SQL = (
+    'DROP TRIGGER IF EXISTS blog_post_fts_insert',
+    'DROP TRIGGER IF EXISTS blog_post_fts_delete',
+    'DROP TRIGGER IF EXISTS blog_post_fts_update',
+    'DROP TABLE IF EXISTS blog_post_fts',
+)
+
+
+def fts5_available(schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return False
+    with closing(sqlite3.connect(':memory:')) as probe:
+        try:
+            probe.execute('CREATE VIRTUAL TABLE probe USING fts5(value)')
+        except sqlite3.OperationalError:
+            return False
+    return True
+
+
+def create_index(apps, schema_editor):
+    if fts5_available(schema_editor):
+        for sql in CREATE_SQL:
+            schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in DROP_SQL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0017_image_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
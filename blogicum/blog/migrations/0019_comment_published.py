@@ -0,0 +1,44 @@
+# Generated by Django 3.2.16 on 2026-10-18 06:57
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_comments(apps, **filters):
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+    Post.objects.update(comment_count=Coalesce(
+        Subquery(
+            Comment.objects.filter(post=OuterRef('pk'), **filters).order_by()
+            .values('post').annotate(total=Count('pk')).values('total')
+        ),
+        0,
+    ))
+
+
+def count_published(apps, schema_editor):
+    count_comments(apps, is_published=True)
+
+
+def count_all(apps, schema_editor):
+    count_comments(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0018_post_search'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='comment_post_created_at_idx',
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['post', 'created_at'], name='comment_published_post_idx'),
+        ),
+        migrations.RunPython(count_published, count_all),
+    ]
@@ -1,4 +1,24 @@
+import hashlib
+from functools import partial
+
+from django.conf import settings
 from django.contrib.auth.mixins import UserPassesTestMixin
+from django.core.cache import cache
+from django.core.paginator import InvalidPage
+from django.http import Http404, HttpResponse
+from django.utils import timezone
+from django.utils.cache import (
+    get_conditional_response, patch_response_headers, patch_vary_headers,
+    quote_etag
+)
+
+from blog.cache import (
+    post_scope, recently_changed, scope_version, versioned_key
+)
+from blog.models import Post
+from blog.paginators import CachedCountPaginator, KeysetPaginator
+from blog.routers import PIN_COOKIE, replica_reads
+from blog.schedule import feed_ttl, next_publication
 
 
 class OnlyAuthorMixin(UserPassesTestMixin):
@@ -6,4 +26,288 @@ class OnlyAuthorMixin(UserPassesTestMixin):
 
     def test_func(self):
         object = self.get_object()
-        return object.author == self.request.user
+        return object.author_id == self.request.user.pk
+
+
+class ReplicaReadMixin:
+    """Миксин чтения данных блога с реплик базы.
+
+    Ответ рендерится внутри контекста реплики: шаблон выполняет ленивые
+    запросы уже после возврата из представления.
+    """
+
+    def can_read_from_replica(self):
+        return (
+            self.request.method in ('GET', 'HEAD')
+            and PIN_COOKIE not in self.request.COOKIES
+        )
+
+    def replica_may_lag(self, *scopes):
+        """Страница читается с реплики, а ленты ``scopes`` менялись недавно.
+
+        Версия ленты уже новая, а реплика могла ещё не получить изменения:
+        такую страницу нельзя кэшировать и помечать ETag новой версии.
+        """
+        return (
+            bool(settings.DATABASE_REPLICAS)
+            and self.can_read_from_replica()
+            and recently_changed(*scopes)
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.can_read_from_replica():
+            return super().dispatch(request, *args, **kwargs)
+        with replica_reads():
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        return response
+
+
+class FeedPaginationMixin:
+    """Миксин пагинации ленты постов.
+
+    В режиме ``BLOG_FEED_PAGINATION = 'keyset'`` лента листается курсором
+    по (pub_date, id); в режиме ``'offset'`` — по номерам страниц, а общее
+    количество постов кэшируется в пределах версии ленты ``feed_scope``.
+    """
+
+    paginator_class = CachedCountPaginator
+    keyset_ordering = ('-pub_date', '-id')
+    cursor_kwarg = 'cursor'
+
+    def get_feed_scope(self):
+        raise NotImplementedError(
+            'Определите get_feed_scope() в представлении ленты.'
+        )
+
+    def get_count_cache_key(self):
+        return versioned_key('feed-count', self.get_feed_scope())
+
+    def get_paginator(self, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True, **kwargs):
+        return super().get_paginator(
+            queryset, per_page, orphans, allow_empty_first_page,
+            cache_key=self.get_count_cache_key(),
+            cache_timeout=feed_ttl(
+                self.get_feed_scope(), settings.BLOG_FEED_COUNT_TIMEOUT
+            ),
+            count_cap=settings.BLOG_FEED_COUNT_CAP,
+            **kwargs,
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        if settings.BLOG_FEED_PAGINATION != 'keyset':
+            return super().paginate_queryset(queryset, page_size)
+        paginator = KeysetPaginator(queryset, page_size, self.keyset_ordering)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidPage as e:
+            raise Http404(str(e))
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+
+class CommentPaginationMixin:
+    """Миксин порционного вывода комментариев поста.
+
+    Выводятся только опубликованные комментарии. Они листаются курсором
+    по (created_at, id), как лента в режиме ``'keyset'``: каждая порция
+    из ``BLOG_COMMENTS_PER_PAGE`` комментариев выбирается одним запросом
+    по частичному индексу (post, created_at) независимо от их общего
+    числа. В контекст попадает страница ``comments``.
+    """
+
+    comment_ordering = ('created_at', 'id')
+    comment_cursor_kwarg = 'cursor'
+
+    def get_comment_cursor(self):
+        return self.request.GET.get(self.comment_cursor_kwarg, '')
+
+    def paginate_comments(self, post):
+        paginator = KeysetPaginator(
+            post.comments.filter(is_published=True).select_related('author'),
+            settings.BLOG_COMMENTS_PER_PAGE,
+            self.comment_ordering,
+        )
+        try:
+            return paginator.page(self.get_comment_cursor())
+        except InvalidPage as e:
+            raise Http404(str(e))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comments'] = self.paginate_comments(self.object)
+        return context
+
+
+class FeedPageCacheMixin:
+    """Миксин кэширования отрисованных страниц ленты.
+
+    Страницы одинаковы для всех анонимных посетителей, поэтому для них
+    HTML хранится в кэше под ключом из версии ленты и номера страницы или
+    курсора. Изменение постов, категорий, местоположений и авторов
+    повышает версию ленты; отложенная публикация ограничивает время жизни
+    как серверного кэша, так и заголовков Expires/Cache-Control.
+
+    Вместе с HTML хранятся заголовки ответа (Content-Type, Vary и другие),
+    кроме тех, что вычисляются заново при каждом запросе. Страница,
+    собранная по отстающей реплике, не сохраняется (``ReplicaReadMixin``).
+    """
+
+    per_request_headers = ('Cache-Control', 'ETag', 'Expires')
+
+    def get(self, request, *args, **kwargs):
+        if (request.user.is_authenticated
+                or not settings.BLOG_FEED_PAGE_TIMEOUT):
+            return super().get(request, *args, **kwargs)
+        key = self.get_page_cache_key()
+        cached = cache.get(key)
+        if cached is not None:
+            content, headers = cached
+            response = HttpResponse(content)
+            for header, value in headers:
+                response[header] = value
+            return self._patch_http_expiry(response)
+        response = super().get(request, *args, **kwargs)
+        if not self.replica_may_lag(self.get_feed_scope()):
+            response.add_post_render_callback(partial(self._cache_page, key))
+        return self._patch_http_expiry(response)
+
+    def get_page_cache_key(self):
+        page = '&'.join(
+            f'{param}={self.request.GET.get(param, "")}'
+            for param in (self.page_kwarg, self.cursor_kwarg)
+        )
+        digest = hashlib.md5(page.encode()).hexdigest()
+        return versioned_key('feed-page', self.get_feed_scope(), digest)
+
+    def get_page_cache_timeout(self):
+        return feed_ttl(
+            self.get_feed_scope(), settings.BLOG_FEED_PAGE_TIMEOUT
+        )
+
+    def _cache_page(self, key, response):
+        if response.status_code == 200:
+            headers = [
+                (header, value) for header, value in response.items()
+                if header not in self.per_request_headers
+            ]
+            cache.set(
+                key, (response.content, headers),
+                self.get_page_cache_timeout(),
+            )
+
+    def _patch_http_expiry(self, response):
+        if settings.BLOG_FEED_HTTP_MAX_AGE:
+            patch_response_headers(response, feed_ttl(
+                self.get_feed_scope(), settings.BLOG_FEED_HTTP_MAX_AGE
+            ))
+            patch_vary_headers(response, ('Cookie',))
+        return response
+
+
+class ConditionalGetMixin:
+    """Миксин условных GET-запросов по ETag.
+
+    Валидатор вычисляется до построения выборки и шаблона; при совпадении
+    с If-None-Match клиент получает 304 без тела. В валидатор всегда входит
+    пользователь: страницы авторизованных посетителей отличаются. Для них
+    добавляется и CSRF-cookie: формы страниц несут токен, который меняется
+    при каждом входе, и старая копия из кэша браузера дала бы 403.
+
+    Страница, собранная по отстающей реплике, ETag не получает
+    (``ReplicaReadMixin``).
+    """
+
+    def get_etag_scope(self):
+        """Лента, версия которой входит в валидатор."""
+        raise NotImplementedError(
+            'Определите get_etag_scope() в представлении.'
+        )
+
+    def get_etag_parts(self):
+        """Значения, от которых зависит страница; None — без ETag."""
+        raise NotImplementedError(
+            'Определите get_etag_parts() в представлении.'
+        )
+
+    def get_etag(self):
+        if self.replica_may_lag(self.get_etag_scope()):
+            return None
+        parts = self.get_etag_parts()
+        if parts is None:
+            return None
+        user = self.request.user
+        csrf = ''
+        if user.is_authenticated:
+            csrf = self.request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+        raw = repr((user.pk, user.get_username(), csrf, *parts))
+        return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+    def get(self, request, *args, **kwargs):
+        etag = self.get_etag()
+        if etag is not None:
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                not_modified['ETag'] = etag
+                return not_modified
+        response = super().get(request, *args, **kwargs)
+        if etag is not None and response.status_code == 200:
+            response['ETag'] = etag
+        return response
+
+
+class FeedConditionalGetMixin(ConditionalGetMixin):
+    """ETag ленты: версия ленты, ближайшая отложенная публикация и страница.
+
+    Версию повышают сигналы при любом изменении, видимом в ленте, а момент
+    отложенной публикации меняется, когда пост появляется сам по себе.
+    Оба значения хранятся в кэше, поэтому проверка обычно обходится без
+    запросов к базе.
+    """
+
+    def get_etag_scope(self):
+        return self.get_feed_scope()
+
+    def get_etag_parts(self):
+        scope = self.get_feed_scope()
+        return (
+            scope,
+            scope_version(scope),
+            next_publication(scope),
+            settings.BLOG_FEED_PAGINATION,
+            self.request.GET.get(self.page_kwarg, ''),
+            self.request.GET.get(self.cursor_kwarg, ''),
+        )
+
+
+class PostConditionalGetMixin(ConditionalGetMixin):
+    """ETag поста: одна выборка по первичному ключу вместо поста с
+    комментариями.
+
+    Правки поста и комментариев повышают версию поста; публикация
+    категории, места и имя автора берутся из связанных строк, порция
+    комментариев и набор полей — из параметров запроса.
+    """
+
+    pk_url_kwarg = 'post_id'
+
+    def get_etag_scope(self):
+        return post_scope(self.kwargs[self.pk_url_kwarg])
+
+    def get_etag_parts(self):
+        post_id = self.kwargs[self.pk_url_kwarg]
+        row = Post.objects.filter(pk=post_id).values_list(
+            'pub_date', 'is_published', 'author_id', 'author__username',
+            'category__is_published', 'category__title', 'category__slug',
+            'location__is_published', 'location__name', 'comment_count',
+        ).first()
+        if row is None:
+            return None
+        pub_date = row[0]
+        return (
+            *row,
+            pub_date <= timezone.now(),
+            scope_version(self.get_etag_scope()),
+            self.request.GET.urlencode(),
+        )
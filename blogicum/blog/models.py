@@ -1,17 +1,37 @@
 from django.contrib.auth import get_user_model
 from django.db import models
-from django.db.models import Count
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.urls import reverse
+from django.utils import timezone
 
 from blog.constants import LINE_LENGTH
 
 
 class CustomManager(models.Manager):
-    def select_annotate(self):
+    def with_related(self):
         return self.select_related(
-            'category', 'location', 'author').annotate(
-            comment_count=Count('comments')
-        ).order_by('-pub_date')
+            'category', 'location', 'author'
+        ).order_by('-pub_date', '-id')
+
+    def sync_comment_count(self):
+        """Пересчитывает счётчик опубликованных комментариев одним UPDATE.
+
+        Затрагивает только посты, у которых сохранённое значение
+        разошлось с фактическим; возвращает число исправленных постов.
+        """
+        actual = Coalesce(
+            Subquery(
+                Comment.objects.filter(
+                    post=OuterRef('pk'), is_published=True
+                ).order_by()
+                .values('post').annotate(total=Count('pk')).values('total')
+            ),
+            0,
+        )
+        return self.get_queryset().filter(
+            ~Q(comment_count=actual)
+        ).update(comment_count=actual)
 
 
 User = get_user_model()
@@ -70,6 +90,18 @@ class Post(PublishedModel):
         verbose_name='Категория'
     )
     image = models.ImageField('Фото', upload_to='post_images', blank=True)
+    image_renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Варианты изображения',
+        help_text='Уменьшенные копии фото, см. blog.images.'
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
     objects = models.Manager()
     filt = CustomManager()
 
@@ -78,6 +110,21 @@ class Post(PublishedModel):
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
         default_related_name = 'posts'
+        indexes = (
+            models.Index(
+                fields=('pub_date',),
+                condition=Q(is_published=True),
+                name='post_published_pub_date_idx',
+            ),
+            models.Index(
+                fields=('category', 'pub_date'),
+                name='post_category_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', 'pub_date'),
+                name='post_author_pub_date_idx',
+            ),
+        )
 
     def get_absolute_url(self):
         return reverse('blog:profile', kwargs={'username': self.username})
@@ -140,3 +187,111 @@ class Comment(PublishedModel):
 
     class Meta:
         ordering = ('created_at',)
+        indexes = (
+            # Комментарии поста на его странице и в счётчике.
+            models.Index(
+                fields=('post', 'created_at'),
+                condition=Q(is_published=True),
+                name='comment_published_post_idx',
+            ),
+        )
+
+
+class OutboundEmail(models.Model):
+    """Письмо в очереди исходящей почты.
+
+    Запрос только сохраняет письмо; отправляет его команда
+    ``send_queued_mail`` (см. ``blog.mail``).
+    """
+
+    subject = models.CharField('Тема', max_length=LINE_LENGTH)
+    body = models.TextField('Текст')
+    from_email = models.CharField('Отправитель', max_length=254)
+    recipients = models.JSONField('Получатели')
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    next_attempt_at = models.DateTimeField('Следующая попытка')
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('next_attempt_at', 'id')
+        indexes = (
+            models.Index(
+                fields=('next_attempt_at',),
+                condition=Q(sent_at__isnull=True),
+                name='outbound_email_pending_idx',
+            ),
+        )
+
+    def __str__(self):
+        return self.subject
+
+
+class ProfileChangeEvent(models.Model):
+    """Изменение профиля, ещё не вошедшее в сводку для администраторов."""
+
+    user_id = models.BigIntegerField('Пользователь')
+    username = models.CharField('Имя пользователя', max_length=150)
+    created_at = models.DateTimeField('Изменено', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'изменение профиля'
+        verbose_name_plural = 'Изменения профилей'
+        ordering = ('created_at',)
+
+    def __str__(self):
+        return self.username
+
+
+class ImageJob(models.Model):
+    """Задание на создание уменьшенных вариантов фото поста.
+
+    Запрос только ставит задание в очередь; фото обрабатывает команда
+    ``process_image_jobs`` (см. ``blog.image_jobs``).
+    """
+
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (PROCESSING, 'Обрабатывается'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='image_jobs',
+        verbose_name='Публикация',
+    )
+    source = models.CharField('Фото', max_length=LINE_LENGTH)
+    status = models.CharField(
+        'Состояние', max_length=16, choices=STATUSES, default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    finished_at = models.DateTimeField('Завершено', null=True, blank=True)
+    worker = models.CharField('Обработчик', max_length=32, blank=True)
+    duration = models.FloatField('Время обработки, с', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'обработка фото'
+        verbose_name_plural = 'Обработка фото'
+        ordering = ('id',)
+        indexes = (
+            models.Index(
+                fields=('id',),
+                condition=Q(status='pending'),
+                name='image_job_pending_idx',
+            ),
+        )
+
+    def __str__(self):
+        return self.source
@@ -0,0 +1,41 @@
+"""Массовая модерация комментариев.
+
+Комментарии скрываются и публикуются одним UPDATE, без сохранения
+каждого объекта и без сигналов. Поэтому счётчики опубликованных
+комментариев постов поправляются тем же способом — одним UPDATE на
+разницу — а версии затронутых постов и лент повышаются явно.
+"""
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Greatest
+
+from blog.cache import invalidate_scopes, post_scope, scopes_for_posts
+from blog.models import Post
+
+
+def set_comments_published(comments, is_published):
+    """Публикует или скрывает комментарии из QuerySet ``comments``.
+
+    Возвращает число комментариев, у которых изменился статус.
+    """
+    changed = comments.filter(is_published=not is_published).order_by()
+    with transaction.atomic():
+        post_ids = list(changed.values_list('post_id', flat=True).distinct())
+        if not post_ids:
+            return 0
+        scopes = scopes_for_posts(
+            Post.objects.filter(pk__in=changed.values('post_id'))
+        )
+        delta = Subquery(
+            changed.filter(post=OuterRef('pk')).values('post')
+            .annotate(total=Count('pk')).values('total')
+        )
+        Post.objects.filter(pk__in=changed.values('post_id')).update(
+            comment_count=(
+                F('comment_count') + delta if is_published
+                else Greatest(F('comment_count') - delta, 0)
+            )
+        )
+        updated = changed.update(is_published=is_published)
+    invalidate_scopes(*map(post_scope, post_ids), *scopes)
+    return updated
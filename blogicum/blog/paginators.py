@@ -0,0 +1,301 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from functools import reduce
+from operator import or_
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, InvalidPage, Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class FeedPage(Page):
+    """Страница с сокращённым списком номеров для шаблона."""
+
+    ellipsis = Paginator.ELLIPSIS
+    on_each_side = 3
+    on_ends = 2
+
+    @property
+    def elided_page_range(self):
+        if not self.paginator.is_capped:
+            return self.paginator.get_elided_page_range(
+                self.number, on_each_side=self.on_each_side,
+                on_ends=self.on_ends,
+            )
+        return self._capped_page_range()
+
+    def _capped_page_range(self):
+        """Номера до следующей страницы: конец ленты неизвестен, поэтому
+        дальше — многоточие, а не ссылки на несуществующие страницы.
+        """
+        if self.number > 1 + self.on_each_side + self.on_ends + 1:
+            yield from range(1, self.on_ends + 1)
+            yield self.ellipsis
+            yield from range(self.number - self.on_each_side, self.number)
+        else:
+            yield from range(1, self.number)
+        yield self.number
+        if self.has_next():
+            yield self.number + 1
+            yield self.ellipsis
+
+    # Есть ли следующая страница при приблизительном количестве.
+    has_more = False
+
+    def has_next(self):
+        if self.paginator.is_capped:
+            return self.has_more
+        return super().has_next()
+
+
+class CachedCountPaginator(Paginator):
+    """Постраничный Paginator с облегчённым и кэшируемым COUNT(*).
+
+    Количество считается по ``values('pk')`` без сортировки и
+    ``select_related``, то есть только с соединениями, нужными фильтрам.
+    Результат хранится в кэше под ``cache_key`` (ключ содержит версию
+    ленты и сбрасывается при её изменении). Если задан ``count_cap``,
+    подсчёт останавливается на ``count_cap + 1`` строке, а в шаблоне
+    количество выводится как «10 000+».
+    """
+
+    def __init__(self, object_list, per_page, orphans=0,
+                 allow_empty_first_page=True, cache_key=None,
+                 cache_timeout=None, count_cap=None):
+        super().__init__(object_list, per_page, orphans,
+                         allow_empty_first_page)
+        self.cache_key = cache_key
+        self.cache_timeout = cache_timeout
+        self.count_cap = count_cap
+
+    @cached_property
+    def count(self):
+        if self.cache_key is None:
+            return self._count()
+        count = cache.get(self.cache_key)
+        if count is None:
+            count = self._count()
+            cache.set(self.cache_key, count, self.cache_timeout)
+        return count
+
+    def _count(self):
+        queryset = self.object_list.order_by().values('pk')
+        if self.count_cap is not None:
+            queryset = queryset[:self.count_cap + 1]
+        return queryset.count()
+
+    @property
+    def is_capped(self):
+        return self.count_cap is not None and self.count > self.count_cap
+
+    @property
+    def count_display(self):
+        if self.is_capped:
+            return f'{self.count_cap:,}+'.replace(',', '\N{NO-BREAK SPACE}')
+        return str(self.count)
+
+    def validate_number(self, number):
+        if not self.is_capped:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise InvalidPage('Номер страницы должен быть целым числом.')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1.')
+        return number
+
+    def page(self, number):
+        if not self.is_capped:
+            return super().page(number)
+        # Точный конец ленты неизвестен: берём срез на строку больше —
+        # по ней видно, есть ли следующая страница.
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('На этой странице нет результатов.')
+        page = self._get_page(rows[:self.per_page], number, self)
+        page.has_more = len(rows) > self.per_page
+        return page
+
+    def _get_page(self, *args, **kwargs):
+        return FeedPage(*args, **kwargs)
+
+
+class CursorPage(Sequence):
+    """Страница курсорной пагинации: без номера и общего количества."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Пагинация по ключу сортировки (seek) вместо OFFSET.
+
+    Каждая страница выбирается одним запросом вида
+    ``WHERE (pub_date, id) < (:pub_date, :id) ORDER BY ... LIMIT n + 1``,
+    поэтому её стоимость не зависит от глубины. Курсор — непрозрачная
+    строка с направлением и значениями ключа граничной записи.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-id')):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = tuple(name.lstrip('-') for name in self.ordering)
+
+    def page(self, cursor=None):
+        if not cursor:
+            rows = self._fetch(self.object_list, self.ordering)
+            return self._build_page(rows, has_previous=False)
+        direction, values = self.decode_cursor(cursor)
+        if direction == NEXT:
+            rows = self._fetch(
+                self.object_list.filter(self._seek(values, reverse=False)),
+                self.ordering,
+            )
+            return self._build_page(rows, has_previous=True)
+        rows = self._fetch(
+            self.object_list.filter(self._seek(values, reverse=True)),
+            tuple(self._flip(name) for name in self.ordering),
+        )
+        has_previous = len(rows) > self.per_page
+        items = rows[:self.per_page][::-1]
+        return self._build_page(items, has_previous, has_next=True)
+
+    def forward(self, cursor=None):
+        """Выборка следующей страницы вперёд от курсора, без её сборки.
+
+        Строк на одну больше страницы: по лишней видно, что дальше есть
+        ещё. Подходит для ``values()``: курсор строится и по словарю.
+        """
+        queryset = self.object_list
+        if cursor:
+            direction, values = self.decode_cursor(cursor)
+            if direction != NEXT:
+                raise InvalidPage('Курсор ведёт только вперёд.')
+            queryset = queryset.filter(self._seek(values, reverse=False))
+        return queryset.order_by(*self.ordering)[:self.per_page + 1]
+
+    def encode_cursor(self, direction, item):
+        values = [self._key_value(item, field) for field in self.fields]
+        payload = json.dumps(
+            [direction, values], default=str, separators=(',', ':')
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            direction, raw_values = json.loads(
+                base64.urlsafe_b64decode(cursor + padding)
+            )
+            if direction not in (NEXT, PREVIOUS):
+                raise ValueError(direction)
+            if len(raw_values) != len(self.fields):
+                raise ValueError(raw_values)
+            opts = self.object_list.model._meta
+            values = [
+                opts.get_field(field).to_python(self._scalar(value))
+                for field, value in zip(self.fields, raw_values)
+            ]
+            # Сравнение с NULL в условии seek невозможно.
+            if None in values:
+                raise ValueError(raw_values)
+        except (binascii.Error, TypeError, ValueError, ValidationError):
+            raise InvalidPage('Некорректный курсор страницы.')
+        return direction, values
+
+    def _fetch(self, queryset, ordering):
+        return list(queryset.order_by(*ordering)[:self.per_page + 1])
+
+    def _build_page(self, rows, has_previous, has_next=None):
+        if has_next is None:
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor(NEXT, rows[-1])
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor(PREVIOUS, rows[0])
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+    def _seek(self, values, reverse):
+        """Условие «строго после курсора» в порядке сортировки.
+
+        Первое поле дополнительно ограничено нестрогим неравенством, чтобы
+        СУБД могла использовать диапазон индекса, а не разбирать OR.
+        """
+        lookups = []
+        for name in self.ordering:
+            descending = name.startswith('-') != reverse
+            lookups.append('lt' if descending else 'gt')
+        branches = []
+        for index, field in enumerate(self.fields):
+            equal = {
+                self.fields[i]: values[i] for i in range(index)
+            }
+            branches.append(Q(
+                **equal, **{f'{field}__{lookups[index]}': values[index]}
+            ))
+        bound = {f'{self.fields[0]}__{lookups[0]}e': values[0]}
+        return Q(**bound) & reduce(or_, branches)
+
+    @staticmethod
+    def _scalar(value):
+        """Значение ключа из курсора: только строка или число."""
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise TypeError(value)
+        return value
+
+    @staticmethod
+    def _flip(name):
+        return name[1:] if name.startswith('-') else f'-{name}'
+
+    @staticmethod
+    def _key_value(item, field):
+        if isinstance(item, dict):
+            return item[field]
+        return getattr(item, field)
+
+
+class SearchPaginator(CachedCountPaginator):
+    """Постраничный вывод результатов поиска (``blog.search``).
+
+    Количество считает сама выборка: результаты — не QuerySet.
+    """
+
+    def _count(self):
+        return self.object_list.count()
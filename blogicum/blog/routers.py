@@ -0,0 +1,56 @@
+"""Маршрутизация чтения данных блога на реплики базы.
+
+Запросы уходят на реплику только внутри :func:`replica_reads`, который
+включают представления только для чтения (``ReplicaReadMixin``). Любая
+запись и всё, что читается вне этого контекста, идёт в основную базу.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+REPLICATED_APPS = {'blog'}
+# Cookie, которую ставит PrimaryPinMiddleware после записи: пока она жива,
+# автор изменений читает основную базу и видит свои правки без задержки
+# репликации.
+PIN_COOKIE = 'pin_primary'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+@contextmanager
+def replica_reads():
+    """Разрешает читать модели блога с реплик в пределах блока."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Чтение — со случайной реплики из ``DATABASE_REPLICAS``, запись —
+    в основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            replicas
+            and _replica_reads.get()
+            and model._meta.app_label in REPLICATED_APPS
+        ):
+            return random.choice(replicas)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы, связи между ними корректны.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема реплик приходит вместе с данными из основной базы.
+        return db not in settings.DATABASE_REPLICAS
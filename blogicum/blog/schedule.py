@@ -0,0 +1,69 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db.models import Min
+from django.utils import timezone
+
+from blog.cache import versioned_key
+from blog.models import Post
+
+NO_SCHEDULED = 'none'
+
+
+def scheduled_posts(scope):
+    """Опубликованные посты ленты, дата публикации которых ещё не наступила.
+
+    Это ровно те посты, которые появятся в ленте без какой-либо записи
+    в базу — только потому, что пройдёт время.
+    """
+    posts = Post.objects.filter(
+        is_published=True,
+        category__is_published=True,
+        pub_date__gt=timezone.now(),
+    )
+    kind, _, value = scope.partition(':')
+    if kind == 'category':
+        posts = posts.filter(category__slug=value)
+    elif kind == 'author':
+        posts = posts.filter(author__username=value)
+    return posts
+
+
+def next_publication(scope):
+    """Момент ближайшей отложенной публикации в ленте или None.
+
+    Значение кэшируется в пределах версии ленты: создание или перенос
+    отложенного поста повышает версию, а сама запись живёт до момента
+    публикации.
+    """
+    key = versioned_key('feed-next-publication', scope)
+    cached = cache.get(key)
+    if cached == NO_SCHEDULED:
+        return None
+    now = timezone.now()
+    if cached is not None:
+        moment = datetime.fromtimestamp(cached, tz=dt_timezone.utc)
+        if moment > now:
+            return moment
+    moment = scheduled_posts(scope).aggregate(next=Min('pub_date'))['next']
+    if moment is None:
+        cache.set(key, NO_SCHEDULED, timeout=None)
+    else:
+        cache.set(
+            key, moment.timestamp(),
+            timeout=max(int((moment - now).total_seconds()), 1),
+        )
+    return moment
+
+
+def feed_ttl(scope, default):
+    """Время жизни кэша ленты в секундах.
+
+    Не больше ``default`` и не дольше момента ближайшей отложенной
+    публикации в этой ленте.
+    """
+    moment = next_publication(scope)
+    if moment is None:
+        return default
+    seconds = (moment - timezone.now()).total_seconds()
+    return max(min(default, int(seconds)), 1)
@@ -0,0 +1,215 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from blog.cache import (
+    INDEX_SCOPE, author_scope, category_scope, invalidate_scopes,
+    post_scope, post_scopes, scopes_for_posts
+)
+from blog.image_jobs import schedule_renditions
+from blog.images import delete_renditions
+from blog.models import Category, Comment, Location, Post
+from blog.suggest import index_object, remove_object
+
+User = get_user_model()
+
+
+def _shift_comment_count(post_id, delta):
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comment_count__gt=0)
+    posts.update(comment_count=F('comment_count') + delta)
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_state(sender, instance, raw=False, **kwargs):
+    """Запоминает пост и статус комментария до сохранения."""
+    instance._old_state = None
+    if raw or instance.pk is None:
+        return
+    instance._old_state = Comment.objects.filter(pk=instance.pk).values_list(
+        'post_id', 'is_published'
+    ).first()
+
+
+@receiver(post_save, sender=Comment)
+def update_comment_count(sender, instance, created, raw=False, **kwargs):
+    """Счётчик поста учитывает только опубликованные комментарии.
+
+    Меняется при добавлении опубликованного комментария, а также при
+    снятии с публикации, повторной публикации или переносе к другому
+    посту.
+    """
+    if raw:
+        return
+    old = None if created else getattr(instance, '_old_state', None)
+    new = (instance.post_id, instance.is_published)
+    if old == new:
+        return
+    if old is not None and old[1]:
+        _shift_comment_count(old[0], -1)
+    if instance.is_published:
+        _shift_comment_count(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrease_comment_count(sender, instance, **kwargs):
+    """Уменьшает счётчик поста при удалении опубликованного комментария.
+
+    Сигнал отправляется и для массового удаления через QuerySet.delete(),
+    и для каскадного удаления вместе с автором.
+    """
+    if instance.is_published:
+        _shift_comment_count(instance.post_id, -1)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_scopes(sender, instance, raw=False, **kwargs):
+    """Запоминает ленты поста до сохранения: категория могла смениться."""
+    instance._old_scopes = []
+    if raw or instance.pk is None:
+        return
+    old = Post.objects.filter(pk=instance.pk).values_list(
+        'category__slug', 'author__username'
+    ).first()
+    if old is not None:
+        slug, username = old
+        instance._old_scopes = [author_scope(username)]
+        if slug is not None:
+            instance._old_scopes.append(category_scope(slug))
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_scope(sender, instance, raw=False, **kwargs):
+    """Запоминает ленту категории до сохранения: slug мог смениться."""
+    instance._old_scopes = []
+    if raw or instance.pk is None:
+        return
+    slug = Category.objects.filter(pk=instance.pk).values_list(
+        'slug', flat=True
+    ).first()
+    if slug is not None:
+        instance._old_scopes = [category_scope(slug)]
+
+
+@receiver(pre_save, sender=User)
+def remember_author_scope(sender, instance, raw=False, update_fields=None,
+                          **kwargs):
+    """Запоминает ленту автора до сохранения: имя могло смениться."""
+    instance._old_scopes = []
+    if (raw or instance.pk is None
+            or update_fields == frozenset({'last_login'})):
+        return
+    username = User.objects.filter(pk=instance.pk).values_list(
+        User.USERNAME_FIELD, flat=True
+    ).first()
+    if username is not None:
+        instance._old_scopes = [author_scope(username)]
+
+
+@receiver(post_save, sender=Post)
+def schedule_post_image(sender, instance, raw=False, **kwargs):
+    """Ставит новое или заменённое фото в очередь на обработку."""
+    if not raw:
+        schedule_renditions(instance)
+
+
+@receiver(post_delete, sender=Post)
+def delete_post_image_renditions(sender, instance, **kwargs):
+    delete_renditions(instance.image_renditions or {})
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, raw=False, **kwargs):
+    """Сбрасывает кэшированные данные лент, в которых виден пост."""
+    if raw:
+        return
+    invalidate_scopes(
+        post_scope(instance.pk),
+        *post_scopes(instance),
+        *getattr(instance, '_old_scopes', ()),
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_feeds(sender, instance, raw=False, **kwargs):
+    """Публикация категории влияет на главную ленту и ленту категории.
+
+    Лента по прежнему slug тоже сбрасывается: по старому адресу больше
+    нечего показывать.
+    """
+    if raw:
+        return
+    invalidate_scopes(
+        INDEX_SCOPE,
+        category_scope(instance.slug),
+        *getattr(instance, '_old_scopes', ()),
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_feeds(sender, instance, raw=False, **kwargs):
+    """Карточка поста в ленте показывает число комментариев."""
+    if raw:
+        return
+    invalidate_scopes(
+        post_scope(instance.post_id),
+        *scopes_for_posts(Post.objects.filter(pk=instance.post_id)),
+    )
+
+
+@receiver(post_save, sender=Location)
+@receiver(pre_delete, sender=Location)
+def invalidate_location_feeds(sender, instance, raw=False, **kwargs):
+    """Название места выводится в карточках всех его постов.
+
+    При удалении ленты собираются заранее: после удаления у постов
+    уже не будет ссылки на местоположение.
+    """
+    if raw:
+        return
+    invalidate_scopes(
+        *scopes_for_posts(Post.objects.filter(location=instance))
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_author_feeds(sender, instance, raw=False, update_fields=None,
+                            **kwargs):
+    """Имя автора выводится в карточках его постов и на странице профиля.
+
+    Обновление только времени входа на ленты не влияет. Профиль по
+    прежнему имени и профиль удалённого пользователя тоже сбрасываются.
+    """
+    if raw or update_fields == frozenset({'last_login'}):
+        return
+    invalidate_scopes(
+        author_scope(instance.get_username()),
+        *getattr(instance, '_old_scopes', ()),
+        *scopes_for_posts(Post.objects.filter(author=instance)),
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Location)
+def update_suggestions(sender, instance, raw=False, update_fields=None,
+                       **kwargs):
+    """Обновляет индекс подсказок по авторам, категориям и местам."""
+    if raw or update_fields == frozenset({'last_login'}):
+        return
+    index_object(instance)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Location)
+def remove_suggestions(sender, instance, **kwargs):
+    remove_object(instance)
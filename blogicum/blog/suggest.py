@@ -0,0 +1,381 @@
+"""Нечёткий поиск авторов, категорий и местоположений по триграммам.
+
+Для каждого вида объектов в памяти процесса хранится индекс
+«триграмма → ключи объектов». Он строится при первом обращении одним
+запросом к базе, а дальше обновляется сигналами сохранения и удаления
+(``blog.signals``). Каждое изменение повышает версию вида в кэше, как
+версии лент в ``blog.cache``, и записывается в кэш событием под новой
+версией. Индекс другого процесса, заметив новую версию, применяет
+пропущенные события и не перестраивается. Перестройка нужна, только если
+событий больше ``MAX_REPLAY`` или часть их вытеснена из кэша — например,
+после массовой загрузки данных, которая очищает кэш.
+
+Страница 404 индекс не строит: пока процесс не построил его для
+``/suggest/``, подсказок на ней нет.
+
+Оценка кандидата — доля триграмм запроса, найденных у объекта, при
+равенстве — сходство Жаккара: так и опечатки, и начало слова при
+наборе дают высокую оценку.
+"""
+import re
+import threading
+from collections import Counter, defaultdict
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import Resolver404, resolve, reverse
+
+from blog.cache import bump_scope, scope_version
+from blog.models import Category, Location
+
+User = get_user_model()
+
+WORD = re.compile(r'\w+')
+MIN_SCORE = 0.5
+# Сколько лучших по числу общих триграмм кандидатов оценивается точно.
+CANDIDATES = 50
+# Частые триграммы («use» в тысячах имён user1, user2…) почти не
+# различают кандидатов, а их подсчёт дорог: списки объектов берутся от
+# редких к частым, пока в сумме не наберётся столько ключей; последний
+# список берётся частично.
+MAX_POSTINGS = 10000
+# Сколько пропущенных событий применяется вместо перестройки индекса и
+# сколько секунд событие хранится в кэше.
+MAX_REPLAY = 1000
+EVENT_TIMEOUT = 60 * 60
+
+
+def trigrams(text):
+    """Триграммы слов текста, дополненных пробелами как в pg_trgm."""
+    grams = set()
+    for word in WORD.findall(text.lower().replace('ё', 'е')):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class Source:
+    """Объекты одного вида: что индексировать и как показать."""
+
+    kind = None
+    model = None
+    fields = ()
+
+    def queryset(self):
+        return self.model.objects.all()
+
+    def is_visible(self, row):
+        return True
+
+    def texts(self, row):
+        raise NotImplementedError
+
+    def label(self, row):
+        return self.texts(row)[0]
+
+    def url_args(self, row):
+        """Имя адреса и аргументы; адрес строится только для ответа."""
+        return None
+
+    def entry(self, row):
+        """Запись индекса: тексты, подпись и адрес подсказки."""
+        return self.texts(row), (self.label(row), self.url_args(row))
+
+
+class AuthorSource(Source):
+    kind = 'author'
+    model = User
+    fields = ('pk', 'username')
+
+    def queryset(self):
+        return User.objects.filter(is_active=True)
+
+    def is_visible(self, row):
+        return row.get('is_active', True)
+
+    def texts(self, row):
+        return (row['username'],)
+
+    def url_args(self, row):
+        return 'blog:profile', row['username']
+
+
+class CategorySource(Source):
+    kind = 'category'
+    model = Category
+    fields = ('pk', 'title', 'slug')
+
+    def queryset(self):
+        return Category.objects.filter(is_published=True)
+
+    def is_visible(self, row):
+        return row.get('is_published', True)
+
+    def texts(self, row):
+        return (row['title'], row['slug'])
+
+    def url_args(self, row):
+        return 'blog:category_posts', row['slug']
+
+
+class LocationSource(Source):
+    kind = 'location'
+    model = Location
+    fields = ('pk', 'name')
+
+    def queryset(self):
+        return Location.objects.filter(is_published=True)
+
+    def is_visible(self, row):
+        return row.get('is_published', True)
+
+    def texts(self, row):
+        return (row['name'],)
+
+
+SOURCES = {
+    source.kind: source
+    for source in (AuthorSource(), CategorySource(), LocationSource())
+}
+
+
+class TrigramIndex:
+    """Индекс объектов одного вида; безопасен для потоков."""
+
+    def __init__(self, version=None):
+        self.version = version
+        self.entries = {}
+        self.postings = defaultdict(set)
+        self.lock = threading.Lock()
+        self.replay_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, key, texts, data):
+        grams = set().union(*map(trigrams, texts))
+        with self.lock:
+            self._remove(key)
+            self.entries[key] = (texts, data)
+            for gram in grams:
+                self.postings[gram].add(key)
+
+    def remove(self, key):
+        with self.lock:
+            self._remove(key)
+
+    def apply(self, key, entry):
+        """Событие журнала: запись ``(тексты, данные)`` или None."""
+        if entry is None:
+            self.remove(key)
+        else:
+            self.add(key, *entry)
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for gram in set().union(*map(trigrams, entry[0])):
+            keys = self.postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.postings[gram]
+
+    def search(self, query, limit=10):
+        """Лучшие совпадения: список ``(оценка, (подпись, адрес))``."""
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+        with self.lock:
+            lists = sorted(
+                (self.postings.get(gram, ()) for gram in query_grams),
+                key=len,
+            )
+            counts = Counter()
+            taken = 0
+            for keys in lists:
+                room = MAX_POSTINGS - taken
+                if room <= 0:
+                    break
+                counts.update(islice(keys, room))
+                taken += min(len(keys), room)
+            candidates = [
+                self.entries[key]
+                for key, _ in counts.most_common(CANDIDATES)
+            ]
+        scored = []
+        for texts, data in candidates:
+            score = min(
+                _score(query, query_grams, text) for text in texts
+            )
+            if -score[0] >= MIN_SCORE:
+                scored.append((score, data))
+        scored.sort(key=lambda item: (item[0], item[1][0]))
+        return [(-score[0], data) for score, data in scored[:limit]]
+
+
+def _score(query, query_grams, text):
+    """Ключ сортировки: доля триграмм запроса, сходство Жаккара и
+    разница длины — одинаковые наборы триграмм у «user999» и
+    «user99999».
+    """
+    grams = trigrams(text)
+    shared = len(query_grams & grams)
+    return (
+        -round(shared / len(query_grams), 3),
+        -shared / len(query_grams | grams),
+        abs(len(text) - len(query)),
+    )
+
+
+_indexes = {}
+_build_lock = threading.Lock()
+
+
+def _scope(kind):
+    return f'suggest:{kind}'
+
+
+def _event_key(kind, version):
+    return f'suggest-event:{kind}:{version}'
+
+
+def build_index(source, version=None):
+    index = TrigramIndex(version)
+    for row in source.queryset().values(*source.fields).iterator():
+        index.add(row['pk'], *source.entry(row))
+    return index
+
+
+def _replay(index, kind, version):
+    """Догоняет индекс до версии ``version`` по событиям из кэша.
+
+    Возвращает False, если событий не хватает и индекс надо перестроить.
+    """
+    with index.replay_lock:
+        missed = range(index.version + 1, version + 1)
+        if not 0 < len(missed) <= MAX_REPLAY:
+            return index.version == version
+        keys = [_event_key(kind, number) for number in missed]
+        events = cache.get_many(keys)
+        if len(events) != len(keys):
+            return False
+        for key in keys:
+            index.apply(*events[key])
+        index.version = version
+    return True
+
+
+def get_index(kind, build=True):
+    """Актуальный индекс вида ``kind``.
+
+    Отставший индекс догоняет изменения по событиям; строится индекс,
+    только если его нет или событий не хватает. С ``build=False`` вместо
+    построения возвращается имеющийся, возможно устаревший, индекс или
+    None.
+    """
+    version = scope_version(_scope(kind))
+    index = _indexes.get(kind)
+    if index is not None and _replay(index, kind, version):
+        return index
+    if not build:
+        return index
+    with _build_lock:
+        index = _indexes.get(kind)
+        if index is None or not _replay(index, kind, version):
+            index = _indexes[kind] = build_index(SOURCES[kind], version)
+    return index
+
+
+def _source_for(instance):
+    for source in SOURCES.values():
+        if isinstance(instance, source.model):
+            return source
+    return None
+
+
+def _row(source, instance):
+    return {
+        field: getattr(instance, field)
+        for field in (*source.fields, 'is_active', 'is_published')
+        if hasattr(instance, field)
+    }
+
+
+def _publish(source, key, entry):
+    """Записывает изменение событием в кэш и применяет его в процессе.
+
+    Остальные процессы применят событие при следующем обращении к
+    индексу.
+    """
+    version = bump_scope(_scope(source.kind))
+    cache.set(
+        _event_key(source.kind, version), (key, entry), EVENT_TIMEOUT
+    )
+    index = _indexes.get(source.kind)
+    if index is not None:
+        _replay(index, source.kind, version)
+
+
+def index_object(instance):
+    """Добавляет или обновляет объект после сохранения."""
+    source = _source_for(instance)
+    row = _row(source, instance)
+    entry = source.entry(row) if source.is_visible(row) else None
+    _publish(source, instance.pk, entry)
+
+
+def remove_object(instance):
+    _publish(_source_for(instance), instance.pk, None)
+
+
+def suggest(query, kinds=None, limit=10, build=True):
+    """Подсказки для строки ``query`` по видам ``kinds`` (по умолчанию
+    по всем), лучшие первыми. С ``build=False`` индексы не строятся и не
+    перестраиваются (см. ``get_index``).
+    """
+    results = []
+    for kind in kinds or SOURCES:
+        index = get_index(kind, build)
+        if index is None:
+            continue
+        for score, (label, url_args) in index.search(query, limit):
+            results.append({
+                'kind': kind,
+                'label': label,
+                'url': reverse(url_args[0], args=url_args[1:])
+                if url_args else None,
+                'score': score,
+            })
+    results.sort(key=lambda result: -result['score'])
+    return results[:limit]
+
+
+NOT_FOUND_KINDS = {
+    'blog:profile': ('author', 'username'),
+    'blog:category_posts': ('category', 'category_slug'),
+}
+
+
+def not_found_suggestions(path, limit=5):
+    """«Возможно, вы искали» для ненайденной страницы.
+
+    Для профиля и категории ищутся авторы и категории по имени из адреса,
+    для неизвестного адреса — и те и другие по последней его части.
+    Индексы здесь не строятся: ответ 404 не должен ждать базу.
+    """
+    try:
+        match = resolve(path)
+    except Resolver404:
+        segments = [part for part in path.split('/') if part]
+        if not segments:
+            return []
+        return suggest(
+            segments[-1], ('author', 'category'), limit, build=False
+        )
+    if match.view_name not in NOT_FOUND_KINDS:
+        return []
+    kind, kwarg = NOT_FOUND_KINDS[match.view_name]
+    return suggest(match.kwargs[kwarg], (kind,), limit, build=False)
@@ -0,0 +1,27 @@
+from django import template
+
+from blog.images import picture_sources, renditions_are_stale
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, purpose, css_class=''):
+    """Фото поста с вариантами под ширину экрана (``srcset``).
+
+    Пока варианты не готовы, выводится оригинал.
+    """
+    context = {'post': post, 'css_class': css_class}
+    renditions = post.image_renditions or {}
+    if renditions_are_stale(post.image.name, renditions):
+        return context
+    sources, width = picture_sources(renditions, purpose)
+    if sources:
+        context.update(
+            sources=sources[:-1],
+            fallback=sources[-1],
+            sizes=f'(max-width: {width}px) 100vw, {width}px',
+            width=width,
+            height=round(renditions['height'] * width / renditions['width']),
+        )
+    return context
@@ -1,21 +1,64 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import api, views
+from .async_views import as_async_view
 
 app_name = 'blog'
 
+
+def read_view(view_class, name):
+    """Асинхронная версия для имён из BLOG_ASYNC_VIEWS, иначе обычная."""
+    if name in settings.BLOG_ASYNC_VIEWS:
+        return as_async_view(view_class)
+    return view_class.as_view()
+
+
 urlpatterns = [
-    path('', views.PostListView.as_view(), name='index'),
+    path('', read_view(views.PostListView, 'index'), name='index'),
     path(
         'posts/<int:post_id>/',
-        views.PostDetailView.as_view(),
+        read_view(views.PostDetailView, 'post_detail'),
         name='post_detail'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        read_view(views.PostCommentsView, 'post_comments'),
+        name='post_comments'
+    ),
     path(
         'category/<slug:category_slug>/',
-        views.CategoryPostsListView.as_view(),
+        read_view(views.CategoryPostsListView, 'category_posts'),
         name='category_posts'
     ),
+    path(
+        'search/',
+        read_view(views.PostSearchView, 'search'),
+        name='search'
+    ),
+    path('suggest/', views.suggestions, name='suggest'),
+    path('api/posts/', read_view(api.ApiPostListView, 'api_index'),
+         name='api_index'),
+    path(
+        'api/posts/<int:post_id>/',
+        read_view(api.ApiPostDetailView, 'api_post_detail'),
+        name='api_post_detail'
+    ),
+    path(
+        'api/posts/<int:post_id>/comments/',
+        read_view(api.ApiPostCommentsView, 'api_post_comments'),
+        name='api_post_comments'
+    ),
+    path(
+        'api/category/<slug:category_slug>/',
+        read_view(api.ApiCategoryPostsView, 'api_category_posts'),
+        name='api_category_posts'
+    ),
+    path(
+        'api/profile/<slug:username>/',
+        read_view(api.ApiProfileView, 'api_profile'),
+        name='api_profile'
+    ),
     path(
         'profile/edit/',
         views.UserProfileUpdateView.as_view(),
@@ -23,7 +66,7 @@ urlpatterns = [
     ),
     path(
         'profile/<slug:username>/',
-        views.UserProfileListView.as_view(),
+        read_view(views.UserProfileListView, 'profile'),
         name='profile'
     ),
     path(
@@ -3,24 +3,38 @@ from datetime import datetime
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.decorators import login_required
-from django.core.mail import send_mail
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse, reverse_lazy
+from django.utils import timezone
+from django.utils.http import urlencode
 from django.views.generic import (
     CreateView, DeleteView, DetailView, ListView, UpdateView
 )
 
 
 from blog.forms import PostForm, CommentForm, ProfileForm
+from blog.digest import record_profile_change
 from blog.models import Post, Category, Comment
 from blog.constants import NUMBER_OBJECTS_PER_PAGE
-from blog.mixins import OnlyAuthorMixin
+from blog.cache import INDEX_SCOPE, author_scope, category_scope
+from blog.mixins import (
+    CommentPaginationMixin, FeedConditionalGetMixin, FeedPageCacheMixin,
+    FeedPaginationMixin, OnlyAuthorMixin, PostConditionalGetMixin,
+    ReplicaReadMixin
+)
+from blog.paginators import SearchPaginator
+from blog.search import SearchResults
+from blog.suggest import SOURCES, suggest
 
 
 User = get_user_model()
 
 
-class PostListView(ListView):
+class PostListView(
+    ReplicaReadMixin, FeedConditionalGetMixin, FeedPageCacheMixin,
+    FeedPaginationMixin, ListView
+):
     """Отображение списка постов (главная страница)."""
 
     model = Post
@@ -29,44 +43,74 @@ class PostListView(ListView):
     paginate_by = NUMBER_OBJECTS_PER_PAGE
 
     def get_queryset(self):
-        return self.model.filt.select_annotate().filter(
+        return self.model.filt.with_related().filter(
             is_published=True,
             category__is_published=True,
             pub_date__lte=datetime.now()
         )
 
+    def get_feed_scope(self):
+        return INDEX_SCOPE
+
 
-class PostDetailView(DetailView):
+class PostDetailView(
+    ReplicaReadMixin, PostConditionalGetMixin, CommentPaginationMixin,
+    DetailView
+):
     """Детальное отображение отдельного поста."""
 
     model = Post
     template_name = 'blog/detail.html'
     pk_url_kwarg = 'post_id'
     context_object_name = 'post'
+    comment_form = True
+
+    def can_read_from_replica(self):
+        # Автор видит на странице и свои скрытые посты: только из основной.
+        return (
+            super().can_read_from_replica()
+            and not self.request.user.is_authenticated
+        )
 
     def get_object(self):
-        post = get_object_or_404(self.model, pk=self.kwargs[self.pk_url_kwarg])
-        if post.author == self.request.user:
-            return post
-        return get_object_or_404(
+        """Пост со связанными объектами загружается одним запросом.
+
+        Видимость для читателя, не являющегося автором, проверяется по
+        уже загруженной строке.
+        """
+        post = get_object_or_404(
             self.model.objects.select_related(
-                'category', 'location', 'author').filter(
-                    pk=self.kwargs[self.pk_url_kwarg],
-                    is_published=True,
-                    category__is_published=True,
-                    pub_date__lte=datetime.now()
-            )
+                'category', 'location', 'author'
+            ),
+            pk=self.kwargs[self.pk_url_kwarg],
         )
+        if post.author_id == self.request.user.pk or (
+            post.is_published
+            and post.category is not None
+            and post.category.is_published
+            and post.pub_date <= timezone.now()
+        ):
+            return post
+        raise Http404('Публикация не найдена.')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['form'] = CommentForm()
-        context['comments'] = (
-            self.object.comments.select_related('author')
-        )
+        if self.comment_form:
+            context['form'] = CommentForm()
         return context
 
 
+class PostCommentsView(PostDetailView):
+    """Следующая порция комментариев поста: фрагмент HTML для подгрузки.
+
+    Доступ, ETag и курсор — как у страницы поста.
+    """
+
+    template_name = 'includes/comment_list.html'
+    # Форма комментария во фрагменте не нужна.
+    comment_form = False
+
+
 class PostCreateView(LoginRequiredMixin, CreateView):
     """Отображение создания нового поста."""
 
@@ -99,7 +143,7 @@ class PostUpdateView(OnlyAuthorMixin, LoginRequiredMixin, UpdateView):
 
     def dispatch(self, request, *args, **kwargs):
         post = self.get_object()
-        if post.author != request.user:
+        if post.author_id != request.user.pk:
             return redirect(
                 'blog:post_detail', self.kwargs[self.pk_url_kwarg]
             )
@@ -122,7 +166,10 @@ class PostDeleteView(OnlyAuthorMixin, LoginRequiredMixin, DeleteView):
         return context
 
 
-class CategoryPostsListView(ListView):
+class CategoryPostsListView(
+    ReplicaReadMixin, FeedConditionalGetMixin, FeedPageCacheMixin,
+    FeedPaginationMixin, ListView
+):
     """Отображение постов отдельной категории."""
 
     model = Post
@@ -132,13 +179,16 @@ class CategoryPostsListView(ListView):
     ordering = '-pub_date'
 
     def get_queryset(self):
-        return self.model.filt.select_annotate().filter(
+        return self.model.filt.with_related().filter(
             category__slug=self.kwargs[self.slug_url_kwarg],
             is_published=True,
             category__is_published=True,
             pub_date__lte=datetime.now()
         )
 
+    def get_feed_scope(self):
+        return category_scope(self.kwargs[self.slug_url_kwarg])
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['category'] = get_object_or_404(
@@ -149,7 +199,10 @@ class CategoryPostsListView(ListView):
         return context
 
 
-class UserProfileListView(ListView):
+class UserProfileListView(
+    ReplicaReadMixin, FeedConditionalGetMixin, FeedPageCacheMixin,
+    FeedPaginationMixin, ListView
+):
     """Отображение страницы конкретного пользователя со списком его постов."""
 
     model = Post
@@ -158,19 +211,29 @@ class UserProfileListView(ListView):
     paginate_by = NUMBER_OBJECTS_PER_PAGE
     ordering = '-pub_date'
 
+    def is_own_profile(self):
+        return self.kwargs[self.slug_url_kwarg] == self.request.user.username
+
     def get_queryset(self):
-        if self.kwargs[self.slug_url_kwarg] == self.request.user.username:
-            return self.model.filt.select_annotate().filter(
+        if self.is_own_profile():
+            return self.model.filt.with_related().filter(
                 author__username=self.request.user,
             )
         else:
-            return self.model.filt.select_annotate().filter(
+            return self.model.filt.with_related().filter(
                 is_published=True,
                 author__username=self.kwargs[self.slug_url_kwarg],
                 category__is_published=True,
                 pub_date__lte=datetime.now()
             )
 
+    def get_feed_scope(self):
+        return author_scope(self.kwargs[self.slug_url_kwarg])
+
+    def get_count_cache_key(self):
+        key = super().get_count_cache_key()
+        return f'{key}:own' if self.is_own_profile() else key
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['profile'] = get_object_or_404(
@@ -180,6 +243,29 @@ class UserProfileListView(ListView):
         return context
 
 
+class PostSearchView(ReplicaReadMixin, ListView):
+    """Поиск по заголовкам и текстам опубликованных постов."""
+
+    template_name = 'blog/search.html'
+    paginate_by = NUMBER_OBJECTS_PER_PAGE
+    paginator_class = SearchPaginator
+    query_kwarg = 'q'
+
+    def get_query(self):
+        return self.request.GET.get(self.query_kwarg, '').strip()
+
+    def get_queryset(self):
+        return SearchResults(self.get_query())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.get_query()
+        context['query'] = query
+        # Ссылки пагинатора сохраняют поисковый запрос.
+        context['page_query'] = urlencode({self.query_kwarg: query}) + '&'
+        return context
+
+
 class UserProfileUpdateView(LoginRequiredMixin, UpdateView):
     """Отображение страницы изменения профиля конкретного пользователя."""
 
@@ -192,14 +278,8 @@ class UserProfileUpdateView(LoginRequiredMixin, UpdateView):
         return self.request.user
 
     def get_success_url(self):
-        """Отправляем письмо, если пользователь изменил профиль."""
-        send_mail(
-            subject='The user changed the profile',
-            message=f'{self.request.user} изменил профиль',
-            from_email='User@post.not',
-            recipient_list=['admin@post.not'],
-            fail_silently=True,
-        )
+        """Отмечаем изменение профиля для сводки администраторам."""
+        record_profile_change(self.object)
         return reverse(
             'blog:profile', kwargs={'username': self.object.username}
         )
@@ -217,7 +297,7 @@ class CommentUpdateView(UserPassesTestMixin, UpdateView):
         comment = get_object_or_404(
             self.model, pk=self.kwargs[self.pk_url_kwarg]
         )
-        return comment.author == self.request.user
+        return comment.author_id == self.request.user.pk
 
     def get_success_url(self):
         return reverse(
@@ -238,7 +318,7 @@ class CommentDeleteView(UserPassesTestMixin, DeleteView):
         comment = get_object_or_404(
             self.model, pk=self.kwargs[self.pk_url_kwarg]
         )
-        return comment.author == self.request.user
+        return comment.author_id == self.request.user.pk
 
 
 @login_required
@@ -252,3 +332,21 @@ def add_comment(request, post_id):
         comment.post = post
         comment.save()
     return redirect('blog:post_detail', post_id)
+
+
+def suggestions(request):
+    """Подсказки при наборе: авторы, категории и местоположения.
+
+    ``?q=`` — строка запроса, ``?kind=`` (можно несколько раз) —
+    виды объектов.
+    """
+    query = request.GET.get('q', '').strip()
+    kinds = [
+        kind for kind in request.GET.getlist('kind') if kind in SOURCES
+    ]
+    try:
+        limit = min(int(request.GET.get('limit', 10)), 20)
+    except ValueError:
+        limit = 10
+    results = suggest(query, kinds, max(limit, 1)) if query else []
+    return JsonResponse({'query': query, 'results': results})
@@ -1,3 +1,5 @@
+import os
+import tempfile
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -33,6 +35,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'blog.middleware.PrimaryPinMiddleware',
 ]
 
 ROOT_URLCONF = 'blogicum.urls'
@@ -59,11 +62,89 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'blogicum.wsgi.application'
 
+# Сколько секунд воркер держит соединение с базой между запросами:
+# 0 — новое соединение на каждый запрос, none — без ограничения.
+# Соединение, оставшееся от прошлого запроса, blog.db перед новым
+# проверяет на работоспособность, если включены DATABASE_HEALTH_CHECKS.
+DATABASE_CONN_MAX_AGE = os.environ.get('BLOGICUM_CONN_MAX_AGE', '60')
+DATABASE_CONN_MAX_AGE = (
+    None if DATABASE_CONN_MAX_AGE.lower() == 'none'
+    else int(DATABASE_CONN_MAX_AGE)
+)
+DATABASE_HEALTH_CHECKS = True
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        # BLOGICUM_DB позволяет, например, гонять бенчмарки на отдельной базе.
+        'NAME': os.environ.get('BLOGICUM_DB', BASE_DIR / 'db.sqlite3'),
+        'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+    }
+}
+
+# Реплики для чтения лент: пути к копиям базы через запятую в переменной
+# окружения BLOGICUM_REPLICAS. Читать с них blog.routers разрешает только
+# представлениям ReplicaReadMixin; после записи пользователь ещё
+# DATABASE_REPLICA_PIN_SECONDS секунд читает основную базу. Столько же
+# после изменения ленты её страницы, собранные по реплике, не попадают в
+# кэш страниц и не получают ETag: реплика могла ещё не догнать основную.
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+    filter(None, os.environ.get('BLOGICUM_REPLICAS', '').split(','))
+):
+    DATABASES[f'replica_{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLICAS.append(f'replica_{number}')
+
+DATABASE_ROUTERS = ['blog.routers.PrimaryReplicaRouter']
+DATABASE_REPLICA_PIN_SECONDS = 10
+
+# Имена маршрутов blog, которые обслуживают асинхронные представления
+# (blog.async_views): под ASGI медленные клиенты не занимают потоки.
+# Под WSGI асинхронные представления лишь добавляют накладные расходы.
+BLOG_ASYNC_VIEWS = set(
+    filter(None, os.environ.get('BLOGICUM_ASYNC_VIEWS', '').split(','))
+)
+# Размер пула потоков, в котором асинхронные представления обращаются к
+# базе; вместе с CONN_MAX_AGE ограничивает число соединений воркера.
+BLOG_ASYNC_VIEW_THREADS = 8
+
+# Прагмы, которые blog.db применяет к каждому новому соединению с SQLite.
+# WAL позволяет читать ленты во время записи комментариев; при нём
+# synchronous=NORMAL не грозит повреждением базы, лишь потерей последних
+# транзакций при сбое питания. busy_timeout — в миллисекундах.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+}
+
+# Бэкенд кэша выбирается переменной окружения BLOGICUM_CACHE. Локальная
+# память годится для одного процесса; файловый и табличный кэш работают
+# без внешних сервисов и общие для всех процессов (для 'db' выполните
+# `python manage.py createcachetable`).
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(tempfile.gettempdir()) / 'blogicum_cache',
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'blogicum_cache',
+    },
+}
+
+CACHES = {
+    'default': CACHE_BACKENDS[os.environ.get('BLOGICUM_CACHE', 'locmem')],
 }
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -103,10 +184,61 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
+# Очередь исходящей почты (blog.mail): число попыток отправки письма и
+# пауза перед первой повторной попыткой в секундах, далее она удваивается.
+BLOG_MAIL_MAX_ATTEMPTS = 5
+BLOG_MAIL_RETRY_DELAY = 60
+
+# Сводка изменений профилей (blog.digest): получатели, отправитель и
+# окно в секундах, раз в которое send_profile_digest --loop её собирает.
+# Буфер процесса сбрасывается в базу при BLOG_DIGEST_BUFFER_SIZE событиях
+# или когда старейшему больше BLOG_DIGEST_BUFFER_SECONDS секунд.
+BLOG_PROFILE_DIGEST_RECIPIENTS = ['admin@post.not']
+BLOG_PROFILE_DIGEST_FROM = 'User@post.not'
+BLOG_DIGEST_WINDOW = 15 * 60
+BLOG_DIGEST_BUFFER_SIZE = 100
+BLOG_DIGEST_BUFFER_SECONDS = 30
+
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Уменьшенные варианты фото постов (blog.images): ширины в пикселях для
+# карточки ленты и страницы поста и форматы в порядке предпочтения.
+BLOG_IMAGE_WIDTHS = {'card': (320, 640), 'detail': (800, 1280)}
+BLOG_IMAGE_FORMATS = ('webp', 'jpeg')
+BLOG_IMAGE_QUALITY = 80
+# Варианты создаёт команда process_image_jobs; после стольких неудачных
+# попыток задание остаётся в состоянии «Ошибка».
+BLOG_IMAGE_JOB_MAX_ATTEMPTS = 3
+
 LOGIN_REDIRECT_URL = 'blog:index'
 
 LOGIN_URL = 'login'
 
 INTERNAL_IPS = ['127.0.0.1', ]
+
+# 'offset' — нумерованные страницы (?page=N),
+# 'keyset' — курсорные страницы (?cursor=...) без подсчёта общего числа.
+BLOG_FEED_PAGINATION = 'offset'
+
+# Время жизни кэшированного количества постов ленты (секунды) и порог,
+# после которого количество выводится приблизительно («10 000+»).
+BLOG_FEED_COUNT_TIMEOUT = 300
+BLOG_FEED_COUNT_CAP = 10000
+# Сколько самых новых совпадений ранжирует поиск по BM25 (blog.search).
+# Окно ограничивает сортировку, но не чтение списков документов FTS5:
+# частые префиксы всё равно обходятся в 130–180 мс на 300 тыс. постов.
+BLOG_SEARCH_RANK_WINDOW = 5000
+
+# Комментариев на странице поста и в каждой подгружаемой порции.
+BLOG_COMMENTS_PER_PAGE = 50
+
+# Наибольший размер страницы JSON API (?limit=, blog.api).
+BLOG_API_MAX_LIMIT = 100
+
+# Время жизни HTML страниц ленты для анонимных посетителей (секунды);
+# 0 отключает кэширование страниц.
+BLOG_FEED_PAGE_TIMEOUT = 600
+
+# Верхняя граница max-age/Expires для анонимных страниц лент (секунды);
+# фактическое значение не превышает времени до отложенной публикации.
+BLOG_FEED_HTTP_MAX_AGE = 60
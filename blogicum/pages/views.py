@@ -1,8 +1,12 @@
 from django.shortcuts import render
 
+from blog.suggest import not_found_suggestions
+
 
 def page_not_found(request, exception):
-    return render(request, 'pages/404.html', status=404)
+    return render(request, 'pages/404.html', {
+        'suggestions': not_found_suggestions(request.path_info),
+    }, status=404)
 
 
 def csrf_failure(request, reason=''):
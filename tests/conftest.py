@@ -41,6 +41,23 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def discard_digest_buffer():
+    from blog.digest import discard_buffer
+
+    discard_buffer()
+    yield
+    discard_buffer()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -363,6 +380,7 @@ def cleanup(request):
                     filename.endswith(".jpg")
                     or filename.endswith(".gif")
                     or filename.endswith(".png")
+                    or filename.endswith(".webp")
             ):
                 file_path = os.path.join(root, filename)
                 if os.path.getmtime(file_path) >= start_time:
@@ -0,0 +1,163 @@
+import base64
+import json
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.utils import timezone
+
+from conftest import N_PER_PAGE
+
+NULL_CURSOR = base64.urlsafe_b64encode(b'["n",[null,null]]').decode()
+
+pytestmark = [pytest.mark.django_db]
+
+
+def read(response):
+    assert response['Content-Type'] == 'application/json'
+    if response.streaming:
+        return json.loads(b''.join(response.streaming_content))
+    return json.loads(response.content)
+
+
+@pytest.fixture
+def feed_posts(mixer, user, published_category, published_location):
+    pub_date = timezone.now() - timedelta(days=1)
+    return mixer.cycle(N_PER_PAGE + 3).blend(
+        'blog.Post',
+        author=user,
+        is_published=True,
+        pub_date=pub_date,
+        category=published_category,
+        location=published_location,
+    )
+
+
+def walk(client, url, **params):
+    ids, cursor = [], None
+    while True:
+        response = client.get(url, {**params, 'cursor': cursor or ''})
+        assert response.status_code == HTTPStatus.OK
+        data = read(response)
+        ids.extend(post['id'] for post in data['results'])
+        cursor = data['next']
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize('feed', ['index', 'category', 'profile'])
+def test_feeds_mirror_html(client, user, feed_posts, feed):
+    post = feed_posts[0]
+    url = {
+        'index': '/api/posts/',
+        'category': f'/api/category/{post.category.slug}/',
+        'profile': f'/api/profile/{user.username}/',
+    }[feed]
+    ids = walk(client, url, limit=4)
+    assert ids == sorted((post.id for post in feed_posts), reverse=True), (
+        "Убедитесь, что лента API обходит посты курсором без пропусков и"
+        " повторов, в том числе с одинаковой датой публикации."
+    )
+
+
+def test_sparse_fields(client, feed_posts):
+    data = read(client.get('/api/posts/', {'fields': 'id,location'}))
+    assert data['results'][0] == {
+        'id': feed_posts[-1].id, 'location': feed_posts[-1].location.name,
+    }, "Убедитесь, что `?fields=` ограничивает поля ответа."
+    full = read(client.get('/api/posts/'))['results'][0]
+    assert {'title', 'text', 'author', 'pub_date', 'comment_count'} <= set(
+        full
+    )
+
+
+@pytest.mark.parametrize('params', [
+    {'fields': 'id,password'}, {'limit': '0'}, {'limit': 'много'},
+    {'cursor': 'мусор'},
+])
+def test_bad_parameters_are_400(client, feed_posts, params):
+    response = client.get('/api/posts/', params)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert 'detail' in read(response)
+
+
+@pytest.mark.parametrize('url', [
+    '/api/posts/', '/api/posts/{id}/', '/api/posts/{id}/comments/',
+])
+def test_null_cursor_is_400(client, post_with_published_location, url):
+    response = client.get(
+        url.format(id=post_with_published_location.id),
+        {'cursor': NULL_CURSOR},
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST, (
+        "Убедитесь, что курсор со значениями null отклоняется с ответом 400."
+    )
+    assert 'detail' in read(response)
+
+
+def test_missing_feed_is_404(client, feed_posts):
+    for url in ('/api/category/nope/', '/api/profile/nobody/'):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert 'detail' in read(response)
+
+
+def test_post_detail_with_published_comments(
+        client, mixer, another_user, post_with_published_location
+):
+    post = post_with_published_location
+    shown, hidden = mixer.cycle(2).blend(
+        'blog.Comment', post=post, author=another_user
+    )
+    hidden.is_published = False
+    hidden.save()
+    data = read(client.get(f'/api/posts/{post.id}/', {'fields': 'id,title'}))
+    assert data['post'] == {'id': post.id, 'title': post.title}
+    assert [comment['id'] for comment in data['comments']] == [shown.id]
+    assert data['comments'][0]['author'] == another_user.username
+    assert data['comments_next'] is None
+
+
+def test_comment_pages(client, mixer, post_with_published_location):
+    post = post_with_published_location
+    comments = mixer.cycle(5).blend('blog.Comment', post=post)
+    first = read(client.get(f'/api/posts/{post.id}/', {'limit': 2}))
+    ids = [comment['id'] for comment in first['comments']]
+    cursor = first['comments_next']
+    while cursor:
+        page = read(client.get(
+            f'/api/posts/{post.id}/comments/', {'limit': 2, 'cursor': cursor}
+        ))
+        ids.extend(comment['id'] for comment in page['results'])
+        cursor = page['next']
+    assert ids == [comment.id for comment in comments]
+
+
+def test_hidden_post(
+        client, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    for url in (f'/api/posts/{post.id}/', f'/api/posts/{post.id}/comments/'):
+        assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+        assert user_client.get(url).status_code == HTTPStatus.OK, (
+            "Убедитесь, что автор видит в API свой скрытый пост."
+        )
+
+
+@pytest.mark.parametrize('url', ['/api/posts/', '/api/posts/{id}/'])
+def test_etag(client, post_with_published_location, url):
+    post = post_with_published_location
+    url = url.format(id=post.id)
+    etag = client.get(url)['ETag']
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert client.get(url, {'fields': 'id'})['ETag'] != etag, (
+        "Убедитесь, что ETag зависит от набора полей."
+    )
+    post.title = 'Новый заголовок'
+    post.save()
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == (
+        HTTPStatus.OK
+    )
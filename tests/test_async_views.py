@@ -0,0 +1,71 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, override_settings
+
+from blog import views
+from blog.async_views import as_async_view
+from blog.urls import read_view
+
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+READ_VIEWS = {
+    'index': (views.PostListView, '/', {}),
+    'post_detail': (views.PostDetailView, '/posts/{id}/', {'post_id': 'id'}),
+}
+
+
+def make_request(path):
+    request = RequestFactory().get(path)
+    request.user = AnonymousUser()
+    return request
+
+
+@pytest.mark.parametrize('name', sorted(READ_VIEWS))
+def test_async_view_matches_sync(name, post_with_published_location):
+    view_class, path, kwargs = READ_VIEWS[name]
+    post = post_with_published_location
+    path = path.format(id=post.id)
+    kwargs = {key: getattr(post, value) for key, value in kwargs.items()}
+
+    sync_response = view_class.as_view()(make_request(path), **kwargs)
+    if hasattr(sync_response, 'render'):
+        sync_response.render()
+    async_response = async_to_sync(as_async_view(view_class))(
+        make_request(path), **kwargs
+    )
+    assert async_response.status_code == HTTPStatus.OK
+    assert getattr(async_response, 'is_rendered', True), (
+        "Убедитесь, что асинхронное представление рендерит шаблон в пуле"
+        " потоков, где выполняются запросы к базе."
+    )
+    assert async_response.content == sync_response.content
+
+
+def test_concurrent_requests(post_with_published_location):
+    view = as_async_view(views.PostDetailView)
+    post_id = post_with_published_location.id
+
+    async def fetch_many():
+        return await asyncio.gather(*(
+            view(make_request(f'/posts/{post_id}/'), post_id=post_id)
+            for _ in range(10)
+        ))
+
+    responses = async_to_sync(fetch_many)()
+    assert {response.status_code for response in responses} == {
+        HTTPStatus.OK
+    }
+
+
+def test_async_view_selected_per_route():
+    with override_settings(BLOG_ASYNC_VIEWS={'index'}):
+        assert asyncio.iscoroutinefunction(
+            read_view(views.PostListView, 'index')
+        )
+        assert not asyncio.iscoroutinefunction(
+            read_view(views.PostDetailView, 'post_detail')
+        )
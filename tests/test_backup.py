@@ -0,0 +1,71 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+
+from blog.backup import export_rows, import_rows
+from blog.models import Category, Comment, Location, Post
+
+pytestmark = [pytest.mark.django_db]
+
+MODELS = (get_user_model(), Category, Location, Post, Comment)
+
+
+def snapshot():
+    return {
+        model._meta.label: list(model.objects.order_by('pk').values())
+        for model in MODELS
+    }
+
+
+def test_round_trip_preserves_rows(
+        mixer, post_with_published_location, another_user
+):
+    mixer.cycle(3).blend(
+        'blog.Comment', post=post_with_published_location,
+        author=another_user,
+    )
+    before = snapshot()
+    stream = StringIO()
+    written = export_rows(stream, chunk_size=2)
+    assert written['blog.comment'] == 3
+    for model in reversed(MODELS):
+        model.objects.all().delete()
+
+    stream.seek(0)
+    loaded = import_rows(stream, batch_size=2)
+    assert loaded == written
+    assert snapshot() == before, (
+        "Убедитесь, что загрузка восстанавливает объекты с теми же"
+        " первичными ключами, датами создания и значениями полей."
+    )
+    new_comment = mixer.blend(
+        'blog.Comment', post=post_with_published_location,
+        author=another_user,
+    )
+    assert new_comment.pk > max(row['id'] for row in before['blog.Comment'])
+
+
+def test_import_rejects_unknown_model(tmp_path):
+    path = tmp_path / 'blog.ndjson'
+    path.write_text('{"model": "auth.group", "pk": 1, "fields": {}}\n')
+    with pytest.raises(CommandError):
+        call_command('import_ndjson', str(path))
+
+
+def test_export_command_writes_gzip(tmp_path, post_with_published_location):
+    path = tmp_path / 'blog.ndjson.gz'
+    call_command('export_ndjson', str(path), stderr=StringIO())
+    assert path.read_bytes()[:2] == b'\x1f\x8b'
+
+
+def test_export_command_writes_to_stdout(post_with_published_location):
+    stdout = StringIO()
+    call_command('export_ndjson', stdout=stdout, stderr=StringIO())
+    lines = stdout.getvalue().splitlines()
+    assert lines and all(lines), (
+        "Убедитесь, что без пути выгрузка пишется в stdout команды по одной"
+        " записи в строке."
+    )
+    assert any('"blog.post"' in line for line in lines)
@@ -0,0 +1,79 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+
+from blog import datagen
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_generator_is_deterministic():
+    def sample(seed):
+        generator = datagen.DatasetGenerator(5, 2, 2, 20, 0, seed=seed)
+        return [
+            (post.title, post.author_id, post.category_id, post.location_id)
+            for post in generator.posts()
+        ]
+
+    assert sample(1) == sample(1)
+    assert sample(1) != sample(2)
+
+
+def test_generate_recounts_comments():
+    datagen.generate(users=5, categories=2, locations=2, posts=20,
+                     comments=50, seed=1)
+    assert Post.objects.count() == 20
+    assert Comment.objects.count() == 50
+    assert sum(Post.objects.values_list('comment_count', flat=True)) == 50, (
+        "Убедитесь, что после генерации данных счётчики комментариев"
+        " постов пересчитаны."
+    )
+
+
+def test_benchmark_reports_percentiles(tmp_path):
+    output = tmp_path / 'bench.json'
+    call_command(
+        'benchmark', generate=True, users=5, categories=2, locations=2,
+        posts=20, comments=20, requests=3, warmup=1, output=str(output),
+        stderr=StringIO(),
+    )
+    report = json.loads(output.read_text(encoding='utf-8'))
+    assert report['meta']['dataset']['posts'] >= 20
+    for name, result in report['results'].items():
+        assert result['errors'] == 0, (
+            f"Убедитесь, что точка входа `{name}` отвечает без ошибок."
+        )
+        assert result['p50_ms'] <= result['p99_ms'] <= result['max_ms']
+
+
+def test_benchmark_requires_data():
+    with pytest.raises(CommandError):
+        call_command('benchmark', requests=2)
+
+
+def test_generate_data_command():
+    stdout, stderr = StringIO(), StringIO()
+    call_command(
+        'generate_data', users=3, categories=2, locations=1, posts=10,
+        comments=30, batch_size=7, stdout=stdout, stderr=stderr,
+    )
+    assert Post.objects.count() == 10
+    assert Comment.objects.count() == 30
+    assert 'Создано строк: 46' in stdout.getvalue()
+    assert '30/30' in stderr.getvalue(), (
+        "Убедитесь, что команда сообщает о ходе загрузки."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bulk_load_pragmas_are_restored():
+    with connection.cursor() as cursor:
+        before = cursor.execute('PRAGMA synchronous').fetchone()[0]
+        with datagen.bulk_load_pragmas():
+            assert cursor.execute('PRAGMA synchronous').fetchone()[0] == 0
+        after = cursor.execute('PRAGMA synchronous').fetchone()[0]
+    assert after == before
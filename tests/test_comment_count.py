@@ -0,0 +1,49 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_count_follows_comments(
+        mixer, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend(Comment, post=post)
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        "Убедитесь, что счётчик комментариев поста увеличивается при"
+        " добавлении комментария."
+    )
+
+    comments[0].delete()
+    Comment.objects.filter(pk=comments[1].pk).delete()
+    post.refresh_from_db()
+    assert post.comment_count == 1, (
+        "Убедитесь, что счётчик комментариев поста уменьшается при"
+        " удалении комментария, в том числе массовом."
+    )
+
+
+def test_feed_query_has_no_aggregation(post_with_published_location):
+    sql = str(Post.filt.with_related().query).upper()
+    assert 'COUNT(' not in sql and 'GROUP BY' not in sql, (
+        "Убедитесь, что запрос ленты не агрегирует комментарии."
+    )
+
+
+def test_recount_comments_fixes_drift(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend(Comment, post=post)
+    Post.objects.filter(pk=post.pk).update(comment_count=42)
+
+    call_command('recount_comments', stdout=StringIO())
+
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что команда `recount_comments` исправляет расхождение"
+        " счётчика комментариев."
+    )
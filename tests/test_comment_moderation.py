@@ -0,0 +1,120 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.cache import INDEX_SCOPE, post_scope, scope_version
+from blog.models import Comment, Post
+from blog.moderation import set_comments_published
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def two_posts(mixer, user, post_with_published_location):
+    other = mixer.blend(
+        'blog.Post',
+        author=user,
+        is_published=True,
+        category=post_with_published_location.category,
+    )
+    return post_with_published_location, other
+
+
+def comment_counts(*posts):
+    return list(
+        Post.objects.filter(pk__in=[post.pk for post in posts])
+        .order_by('pk').values_list('comment_count', flat=True)
+    )
+
+
+def test_hidden_comment_is_not_shown_or_counted(
+        client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    shown, hidden = mixer.cycle(2).blend(
+        Comment, post=post, text=mixer.sequence('Видно', 'Скрыто')
+    )
+    hidden.is_published = False
+    hidden.save()
+    assert comment_counts(post) == [1], (
+        "Убедитесь, что счётчик учитывает только опубликованные"
+        " комментарии."
+    )
+    response = client.get(f'/posts/{post.id}/')
+    assert list(response.context['comments']) == [shown], (
+        "Убедитесь, что на странице поста выводятся только опубликованные"
+        " комментарии."
+    )
+
+    hidden.is_published = True
+    hidden.save()
+    assert comment_counts(post) == [2]
+    hidden.is_published = False
+    hidden.save()
+    hidden.delete()
+    assert comment_counts(post) == [1], (
+        "Убедитесь, что удаление скрытого комментария не меняет счётчик."
+    )
+
+
+def test_bulk_moderation_is_set_based(
+        mixer, user, another_user, two_posts, django_assert_num_queries
+):
+    first, second = two_posts
+    mixer.cycle(5).blend(Comment, post=first, author=another_user)
+    mixer.cycle(3).blend(Comment, post=second, author=another_user)
+    mixer.cycle(2).blend(Comment, post=first, author=user)
+    index_version = scope_version(INDEX_SCOPE)
+    post_version = scope_version(post_scope(second.pk))
+
+    # Посты, ленты, счётчики, комментарии и точка сохранения транзакции —
+    # независимо от числа комментариев.
+    with django_assert_num_queries(6):
+        hidden = set_comments_published(
+            Comment.objects.filter(author=another_user), False
+        )
+    assert hidden == 8
+    assert comment_counts(first, second) == [2, 0]
+    assert scope_version(INDEX_SCOPE) != index_version
+    assert scope_version(post_scope(second.pk)) != post_version, (
+        "Убедитесь, что массовая модерация сбрасывает кэш постов и лент."
+    )
+
+    assert set_comments_published(
+        Comment.objects.filter(author=another_user), False
+    ) == 0
+    assert set_comments_published(
+        Comment.objects.filter(post=first), True
+    ) == 5
+    assert comment_counts(first, second) == [7, 0]
+
+
+def test_moderate_comments_command(mixer, another_user, two_posts):
+    first, second = two_posts
+    mixer.cycle(2).blend(Comment, post=first, author=another_user)
+    mixer.cycle(2).blend(Comment, post=second, author=another_user)
+
+    call_command('moderate_comments', post=first.pk, stdout=StringIO())
+    assert comment_counts(first, second) == [0, 2]
+    call_command(
+        'moderate_comments', author=another_user.username, stdout=StringIO()
+    )
+    assert comment_counts(first, second) == [0, 0]
+    call_command(
+        'moderate_comments', author=another_user.username, publish=True,
+        stdout=StringIO(),
+    )
+    assert comment_counts(first, second) == [2, 2]
+
+
+def test_recount_ignores_hidden_comments(
+        mixer, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(3).blend(Comment, post=post)
+    Comment.objects.filter(pk=post.comments.first().pk).update(
+        is_published=False
+    )
+    assert Post.filt.sync_comment_count() == 1
+    assert comment_counts(post) == [2]
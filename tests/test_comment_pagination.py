@@ -0,0 +1,113 @@
+import base64
+import re
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.test import override_settings
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+PER_PAGE = 3
+NEXT_CURSOR = re.compile(r'data-comments-url="[^"?]*\?cursor=([^"]+)"')
+
+
+@pytest.fixture(autouse=True)
+def small_pages():
+    with override_settings(BLOG_COMMENTS_PER_PAGE=PER_PAGE):
+        yield
+
+
+@pytest.fixture
+def many_comments(mixer, another_user, post_with_published_location):
+    # Одинаковое время у части комментариев: порядок задаёт id.
+    created_at = timezone.now() - timedelta(hours=1)
+    comments = mixer.cycle(PER_PAGE * 2 + 1).blend(
+        'blog.Comment',
+        post=post_with_published_location,
+        author=another_user,
+    )
+    post_with_published_location.comments.filter(
+        pk__in=[comment.pk for comment in comments[1:5]]
+    ).update(created_at=created_at)
+    return list(post_with_published_location.comments.order_by(
+        'created_at', 'id'
+    ))
+
+
+def next_cursor(response):
+    match = NEXT_CURSOR.search(response.content.decode('utf-8'))
+    return match and match.group(1)
+
+
+def test_comments_load_in_batches(
+        user_client, post_with_published_location, many_comments
+):
+    post = post_with_published_location
+    response = user_client.get(f'/posts/{post.id}/')
+    batches = [list(response.context['comments'])]
+    assert 'form' in response.context
+    cursor = next_cursor(response)
+    while cursor:
+        response = user_client.get(
+            f'/posts/{post.id}/comments/', {'cursor': cursor}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert 'form' not in response.context, (
+            "Убедитесь, что фрагмент с комментариями не содержит формы."
+        )
+        batches.append(list(response.context['comments']))
+        cursor = next_cursor(response)
+    assert [len(batch) for batch in batches] == [PER_PAGE, PER_PAGE, 1]
+    assert [comment for batch in batches for comment in batch] == (
+        many_comments
+    ), (
+        "Убедитесь, что комментарии подгружаются по (created_at, id) без"
+        " пропусков и повторов."
+    )
+
+
+def test_detail_page_follows_cursor(
+        client, post_with_published_location, many_comments
+):
+    url = f'/posts/{post_with_published_location.id}/'
+    first = client.get(url)
+    second = client.get(url, {'cursor': next_cursor(first)})
+    assert list(second.context['comments']) == many_comments[
+        PER_PAGE:PER_PAGE * 2
+    ], "Убедитесь, что без JavaScript порции листаются на странице поста."
+    assert first['ETag'] != second['ETag']
+
+
+@pytest.mark.parametrize('url', ['/posts/{id}/', '/posts/{id}/comments/'])
+def test_bad_cursor_is_404(client, post_with_published_location, url):
+    response = client.get(
+        url.format(id=post_with_published_location.id), {'cursor': 'мусор'}
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.parametrize('url', ['/posts/{id}/', '/posts/{id}/comments/'])
+def test_null_cursor_is_404(client, post_with_published_location, url):
+    cursor = base64.urlsafe_b64encode(b'["n",[null,null]]').decode()
+    response = client.get(
+        url.format(id=post_with_published_location.id), {'cursor': cursor}
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND, (
+        "Убедитесь, что курсор со значениями null отклоняется с ответом 404."
+    )
+
+
+def test_hidden_post_comments_are_404(
+        another_user_client, user_client, post_with_published_location,
+        many_comments
+):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    url = f'/posts/{post.id}/comments/'
+    assert another_user_client.get(url).status_code == HTTPStatus.NOT_FOUND
+    assert user_client.get(url).status_code == HTTPStatus.OK, (
+        "Убедитесь, что автор видит комментарии к своему скрытому посту."
+    )
@@ -0,0 +1,115 @@
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.test import Client
+
+pytestmark = [pytest.mark.django_db]
+
+
+def revalidate(client, url, etag):
+    return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+
+@pytest.mark.parametrize('url', ['/', 'category', 'profile', 'detail'])
+def test_not_modified(
+        client, url, post_with_published_location,
+        django_assert_max_num_queries
+):
+    post = post_with_published_location
+    url = {
+        'category': f'/category/{post.category.slug}/',
+        'profile': f'/profile/{post.author.username}/',
+        'detail': f'/posts/{post.id}/',
+    }.get(url, url)
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    etag = response['ETag']
+
+    with django_assert_max_num_queries(1):
+        response = revalidate(client, url, etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+        "Убедитесь, что при совпадении ETag страница отвечает 304 и"
+        " выполняет не больше одного запроса к базе."
+    )
+
+    post.text = 'Обновлённый текст поста'
+    post.save()
+    response = revalidate(client, url, etag)
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что ETag меняется при изменении поста."
+    )
+
+
+def test_detail_etag_follows_comments(
+        user_client, mixer, post_with_published_location
+):
+    url = f'/posts/{post_with_published_location.id}/'
+    etag = user_client.get(url)['ETag']
+    comment = mixer.blend('blog.Comment', post=post_with_published_location)
+    etag_with_comment = user_client.get(url)['ETag']
+    assert etag_with_comment != etag
+
+    comment.text = 'Отредактированный комментарий'
+    comment.save()
+    assert revalidate(user_client, url, etag_with_comment).status_code == (
+        HTTPStatus.OK
+    ), "Убедитесь, что ETag поста меняется при правке комментария."
+
+
+def test_etag_differs_per_user(
+        client, user_client, post_with_published_location
+):
+    url = f'/posts/{post_with_published_location.id}/'
+    anonymous_etag = client.get(url)['ETag']
+    assert revalidate(user_client, url, anonymous_etag).status_code == (
+        HTTPStatus.OK
+    ), (
+        "Убедитесь, что авторизованный пользователь не получает 304 по ETag"
+        " страницы, отданной анонимному посетителю."
+    )
+
+
+def test_etag_changes_after_relogin(mixer, post_with_published_location):
+    password = 'Пароль-для-теста-1'
+    user = mixer.blend('auth.User')
+    user.set_password(password)
+    user.save()
+    client = Client(enforce_csrf_checks=True)
+
+    def login():
+        client.get('/auth/login/')
+        response = client.post('/auth/login/', {
+            'username': user.username,
+            'password': password,
+            'csrfmiddlewaretoken': client.cookies[
+                settings.CSRF_COOKIE_NAME
+            ].value,
+        })
+        assert response.status_code == HTTPStatus.FOUND
+
+    post = post_with_published_location
+    url = f'/posts/{post.id}/'
+    login()
+    etag = client.get(url)['ETag']
+    client.get('/auth/logout/')
+    login()
+    response = revalidate(client, url, etag)
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что после повторного входа страница с формой не отдаётся"
+        " как 304: в кэше браузера остался бы старый CSRF-токен."
+    )
+    response = client.post(f'/posts/{post.id}/comment/', {
+        'text': 'Комментарий после повторного входа',
+        'csrfmiddlewaretoken': response.context['csrf_token'],
+    })
+    assert response.status_code == HTTPStatus.FOUND
+
+
+def test_no_etag_for_hidden_post(client, post_with_published_location):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    response = client.get(f'/posts/{post.id}/')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert not response.has_header('ETag')
@@ -0,0 +1,78 @@
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    return [
+        query['sql'] for query in ctx.captured_queries
+        if 'COUNT(' in query['sql'].upper()
+    ]
+
+
+def test_count_query_is_stripped_and_cached(
+        user_client, many_posts_with_published_locations
+):
+    first = count_queries(user_client, '/')
+    assert len(first) == 1
+    assert 'blog_location' not in first[0], (
+        "Убедитесь, что количество постов ленты считается без соединений,"
+        " не нужных для фильтрации."
+    )
+    assert 'ORDER BY' not in first[0].upper()
+
+    assert count_queries(user_client, '/') == [], (
+        "Убедитесь, что количество постов ленты берётся из кэша."
+    )
+
+
+def test_count_invalidated_on_unpublish(
+        user_client, many_posts_with_published_locations
+):
+    response = user_client.get('/')
+    total = response.context['paginator'].count
+
+    post = many_posts_with_published_locations[0]
+    post.is_published = not post.is_published
+    post.save()
+
+    response = user_client.get('/')
+    assert response.context['paginator'].count != total, (
+        "Убедитесь, что кэшированное количество постов сбрасывается при"
+        " снятии поста с публикации."
+    )
+
+
+@override_settings(BLOG_FEED_COUNT_CAP=N_PER_PAGE // 2)
+def test_capped_count(user, user_client, many_posts_with_published_locations):
+    url = f'/profile/{user.username}/'
+    response = user_client.get(url)
+    paginator = response.context['paginator']
+    assert paginator.is_capped
+    assert f'{N_PER_PAGE // 2}+' in response.content.decode('utf-8'), (
+        "Убедитесь, что при превышении порога количество постов выводится"
+        " приблизительно."
+    )
+    assert user_client.get(url, {'page': 2}).status_code == 200
+    assert user_client.get(url, {'page': 3}).status_code == 404
+
+
+@override_settings(BLOG_FEED_COUNT_CAP=N_PER_PAGE // 2)
+def test_capped_page_range(user_client, user,
+                           many_posts_with_published_locations):
+    url = f'/profile/{user.username}/'
+    first = user_client.get(url).context['page_obj']
+    assert list(first.elided_page_range) == [1, 2, first.ellipsis], (
+        "Убедитесь, что при приблизительном количестве номера страниц"
+        " выводятся только до следующей страницы, а дальше — многоточие."
+    )
+    last = user_client.get(url, {'page': 2}).context['page_obj']
+    assert list(last.elided_page_range) == [1, 2]
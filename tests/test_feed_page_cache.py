@@ -0,0 +1,136 @@
+from datetime import timedelta
+
+import pytest
+from django.test import RequestFactory
+from django.utils import timezone
+
+from blog.views import PostListView
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_anonymous_feed_served_from_cache(
+        client, post_with_published_location, django_assert_num_queries
+):
+    first = client.get('/')
+    assert first.status_code == 200
+    with django_assert_num_queries(0):
+        second = client.get('/')
+    assert second.content == first.content, (
+        "Убедитесь, что повторный запрос главной страницы анонимным"
+        " посетителем обслуживается из кэша."
+    )
+
+
+def test_authenticated_feed_not_cached(user_client, user,
+                                       post_with_published_location):
+    user_client.get('/')
+    response = user_client.get('/')
+    assert user.username in response.content.decode('utf-8')
+    assert response.context is not None, (
+        "Убедитесь, что страницы ленты авторизованного пользователя не"
+        " берутся из кэша анонимных страниц."
+    )
+
+
+@pytest.mark.parametrize('url', ['/', 'category', 'profile'])
+def test_cache_invalidated_on_changes(
+        client, url, post_with_published_location
+):
+    post = post_with_published_location
+    url = {
+        'category': f'/category/{post.category.slug}/',
+        'profile': f'/profile/{post.author.username}/',
+    }.get(url, url)
+    client.get(url)
+
+    post.title = 'Новый заголовок поста'
+    post.save()
+    assert post.title in client.get(url).content.decode('utf-8'), (
+        "Убедитесь, что кэш ленты сбрасывается при изменении поста."
+    )
+
+    post.location.name = 'Новое название места'
+    post.location.save()
+    assert post.location.name in client.get(url).content.decode('utf-8'), (
+        "Убедитесь, что кэш ленты сбрасывается при изменении"
+        " местоположения поста."
+    )
+
+    post.author.username = 'renamed_author'
+    post.author.save()
+    if 'profile' in url:
+        assert client.get(url).status_code == 404, (
+            "Убедитесь, что после переименования автора кэш профиля по"
+            " прежнему адресу сбрасывается."
+        )
+        url = '/profile/renamed_author/'
+    assert 'renamed_author' in client.get(url).content.decode('utf-8'), (
+        "Убедитесь, что кэш ленты сбрасывается при изменении автора"
+        " поста."
+    )
+
+
+def test_renamed_category_feed_invalidated(
+        client, post_with_published_location
+):
+    category = post_with_published_location.category
+    old_url = f'/category/{category.slug}/'
+    assert client.get(old_url).status_code == 200
+    category.slug = 'renamed-category'
+    category.save()
+    assert client.get(old_url).status_code == 404, (
+        "Убедитесь, что после смены slug категории кэш ленты по прежнему"
+        " адресу сбрасывается."
+    )
+
+
+def test_deleted_author_profile_invalidated(client, another_user):
+    url = f'/profile/{another_user.username}/'
+    assert client.get(url).status_code == 200
+    another_user.delete()
+    assert client.get(url).status_code == 404, (
+        "Убедитесь, что кэш профиля сбрасывается при удалении пользователя"
+        " без постов."
+    )
+
+
+def test_cached_page_keeps_headers(
+        client, monkeypatch, post_with_published_location
+):
+    content_type = 'application/xhtml+xml; charset=utf-8'
+    monkeypatch.setattr(PostListView, 'content_type', content_type)
+    client.get('/')
+    response = client.get('/')
+    assert response.context is None
+    assert response['Content-Type'] == content_type, (
+        "Убедитесь, что страница из кэша отдаётся с заголовками исходного"
+        " ответа."
+    )
+    assert response['Vary'] == 'Cookie'
+
+
+def test_comment_invalidates_feed(client, mixer, post_with_published_location):
+    client.get('/')
+    mixer.blend('blog.Comment', post=post_with_published_location)
+    assert '(1)' in client.get('/').content.decode('utf-8'), (
+        "Убедитесь, что кэш ленты сбрасывается при добавлении комментария."
+    )
+
+
+def test_timeout_bounded_by_scheduled_post(
+        mixer, user, published_category, post_with_published_location
+):
+    mixer.blend(
+        'blog.Post',
+        author=user,
+        is_published=True,
+        category=published_category,
+        pub_date=timezone.now() + timedelta(seconds=30),
+    )
+    view = PostListView()
+    view.setup(RequestFactory().get('/'))
+    assert view.get_page_cache_timeout() <= 30, (
+        "Убедитесь, что кэш ленты истекает не позже момента отложенной"
+        " публикации."
+    )
@@ -0,0 +1,126 @@
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.images import ImageFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from PIL import Image
+
+from blog.image_jobs import process_image_jobs
+from blog.images import rendition_name
+from blog.models import ImageJob, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def wide_post(mixer, user, published_category):
+    img_io = BytesIO()
+    Image.new('RGB', (1500, 1000), color=(73, 109, 137)).save(
+        img_io, format='JPEG'
+    )
+    return mixer.blend(
+        'blog.Post', is_published=True, category=published_category,
+        author=user, image=ImageFile(img_io, name='wide_image.jpg'),
+    )
+
+
+def test_upload_only_queues_job(client, wide_post):
+    assert Post.objects.get(pk=wide_post.pk).image_renditions == {}, (
+        "Убедитесь, что фото не обрабатывается во время запроса."
+    )
+    job = ImageJob.objects.get(post=wide_post)
+    assert job.status == ImageJob.PENDING
+    assert job.source == wide_post.image.name
+    content = client.get('/').content.decode()
+    assert '<picture>' not in content
+    assert wide_post.image.url in content, (
+        "Убедитесь, что до обработки выводится оригинал фото."
+    )
+
+
+def test_worker_creates_renditions(wide_post):
+    stats = process_image_jobs().as_dict()
+    assert stats['done'] == 1 and stats['failed'] == 0
+    assert ImageJob.objects.get(post=wide_post).status == ImageJob.DONE
+    renditions = Post.objects.get(pk=wide_post.pk).image_renditions
+    assert renditions['source'] == wide_post.image.name
+    assert set(renditions['files']) == {'webp', 'jpeg'}
+    assert set(renditions['files']['webp']) == {'320', '640', '800', '1280'}
+    path = renditions['files']['webp']['320']
+    assert default_storage.exists(path)
+    with default_storage.open(path) as fh, Image.open(fh) as image:
+        assert image.format == 'WEBP'
+        assert image.size == (320, 213)
+
+
+def test_small_image_not_upscaled(post_with_published_location):
+    process_image_jobs()
+    renditions = Post.objects.get(
+        pk=post_with_published_location.pk
+    ).image_renditions
+    assert set(renditions['files']['jpeg']) == {'100'}, (
+        "Убедитесь, что варианты фото не шире оригинала."
+    )
+
+
+def test_feed_card_uses_srcset(client, wide_post):
+    process_image_jobs()
+    content = client.get('/').content.decode()
+    assert 'type="image/webp"' in content
+    assert 'wide_image' in content and '_640.webp 640w' in content
+    assert '_1280.' not in content, (
+        "Убедитесь, что карточка ленты не ссылается на варианты для"
+        " страницы поста."
+    )
+    assert content.count('<picture>') == 1
+
+
+def test_replaced_image_renditions_removed(wide_post):
+    process_image_jobs()
+    wide_post.refresh_from_db()
+    old_path = wide_post.image_renditions['files']['jpeg']['320']
+    wide_post.image = None
+    wide_post.save()
+    assert Post.objects.get(pk=wide_post.pk).image_renditions == {}
+    assert not default_storage.exists(old_path)
+
+
+def test_superseded_job_discarded(wide_post):
+    path = rendition_name(wide_post.image.name, 320, 'webp')
+    wide_post.image = None
+    wide_post.save()
+    process_image_jobs()
+    assert Post.objects.get(pk=wide_post.pk).image_renditions == {}, (
+        "Убедитесь, что варианты заменённого фото не сохраняются."
+    )
+    assert not default_storage.exists(path)
+
+
+def test_broken_image_retried_then_failed(settings, wide_post):
+    settings.BLOG_IMAGE_JOB_MAX_ATTEMPTS = 2
+    with default_storage.open(wide_post.image.name, 'wb') as fh:
+        fh.write(b'not an image')
+    assert process_image_jobs().as_dict()['failed'] == 1
+    job = ImageJob.objects.get(post=wide_post)
+    assert job.status == ImageJob.PENDING and job.last_error
+    process_image_jobs()
+    job.refresh_from_db()
+    assert job.status == ImageJob.FAILED and job.attempts == 2
+
+
+def test_backfill_and_worker_commands(wide_post):
+    ImageJob.objects.all().delete()
+    stdout = StringIO()
+    call_command('generate_renditions', stdout=stdout)
+    assert 'Поставлено в очередь фото: 1' in stdout.getvalue()
+    call_command('generate_renditions', stdout=stdout)
+    assert ImageJob.objects.count() == 1, (
+        "Убедитесь, что фото в очереди не добавляется повторно."
+    )
+    stdout = StringIO()
+    call_command('process_image_jobs', workers=2, stdout=stdout)
+    assert 'Обработано фото: 1, с ошибкой: 0' in stdout.getvalue()
+    assert 'фото/с' in stdout.getvalue()
+    renditions = Post.objects.get(pk=wide_post.pk).image_renditions
+    assert renditions['source'] == wide_post.image.name
@@ -0,0 +1,104 @@
+import base64
+import json
+from datetime import timedelta
+
+import pytest
+from django.test import override_settings
+from django.utils import timezone
+
+from conftest import N_PER_PAGE
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.usefixtures('keyset_mode'),
+]
+
+
+@pytest.fixture
+def keyset_mode():
+    with override_settings(BLOG_FEED_PAGINATION='keyset'):
+        yield
+
+
+@pytest.fixture
+def same_time_posts(mixer, user, published_category, published_location):
+    pub_date = timezone.now() - timedelta(days=1)
+    return mixer.cycle(N_PER_PAGE * 2 + 3).blend(
+        'blog.Post',
+        author=user,
+        is_published=True,
+        pub_date=pub_date,
+        category=published_category,
+        location=published_location,
+    )
+
+
+def walk(client, url, cursor_attr):
+    pages = []
+    cursor = None
+    while True:
+        response = client.get(url, {'cursor': cursor} if cursor else {})
+        assert response.status_code == 200
+        page = response.context['page_obj']
+        pages.append(page)
+        cursor = getattr(page, cursor_attr)
+        if cursor is None:
+            return pages
+
+
+def test_feed_walks_forward_and_back(user_client, same_time_posts):
+    url = '/'
+    forward = walk(user_client, url, 'next_cursor')
+    ids = [post.id for page in forward for post in page]
+    expected = sorted((post.id for post in same_time_posts), reverse=True)
+    assert ids == expected, (
+        "Убедитесь, что курсорная пагинация обходит ленту без пропусков и"
+        " повторов, в том числе для постов с одинаковой датой публикации."
+    )
+    assert [len(page) for page in forward] == [N_PER_PAGE, N_PER_PAGE, 3]
+
+    last = forward[-1]
+    response = user_client.get(url, {'cursor': last.previous_cursor})
+    assert [post.id for post in response.context['page_obj']] == [
+        post.id for post in forward[-2]
+    ], "Убедитесь, что ссылка на предыдущую страницу ведёт назад по ленте."
+
+
+@override_settings(BLOG_FEED_PAGE_TIMEOUT=0)
+def test_deep_page_query_count_is_constant(
+        client, same_time_posts, django_assert_max_num_queries
+):
+    first = client.get('/').context['page_obj']
+    with django_assert_max_num_queries(1):
+        response = client.get('/', {'cursor': first.next_cursor})
+    assert response.status_code == 200
+
+
+def test_paginator_needs_no_count(user_client, same_time_posts):
+    content = user_client.get('/').content.decode('utf-8')
+    assert '?cursor=' in content, (
+        "Убедитесь, что в режиме курсорной пагинации шаблон выводит ссылки"
+        " с курсором."
+    )
+    assert '?page=' not in content
+
+
+def test_invalid_cursor_is_404(user_client, same_time_posts):
+    response = user_client.get('/', {'cursor': 'broken'})
+    assert response.status_code == 404
+
+
+def crafted_cursor(values):
+    payload = json.dumps(['n', values]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('values', [
+    [None, None], [None, 1], [[1], 1], [{'a': 1}, 1], [True, 1],
+])
+def test_non_scalar_cursor_is_404(user_client, same_time_posts, values):
+    response = user_client.get('/', {'cursor': crafted_cursor(values)})
+    assert response.status_code == 404, (
+        "Убедитесь, что курсор с null или составными значениями ключа"
+        " отклоняется с ответом 404, а не ошибкой сервера."
+    )
@@ -0,0 +1,75 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.mail import deliver_queued_mail, enqueue_mail
+from blog.models import OutboundEmail
+
+pytestmark = [pytest.mark.django_db]
+
+
+def queue(count):
+    for number in range(count):
+        enqueue_mail(f'Тема {number}', 'Текст', 'from@post.not',
+                     ['to@post.not'])
+
+
+def refuse(self, messages):
+    raise ConnectionError('SMTP недоступен')
+
+
+def test_queued_mail_delivered():
+    queue(1)
+    assert mail.outbox == [], (
+        "Убедитесь, что письмо из очереди не отправляется сразу."
+    )
+    call_command('send_queued_mail', stdout=StringIO())
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].to == ['to@post.not']
+    assert not OutboundEmail.objects.filter(sent_at__isnull=True).exists()
+
+
+def test_batch_reuses_connection(monkeypatch):
+    opened = []
+    monkeypatch.setattr(EmailBackend, 'open', lambda self: opened.append(1))
+    queue(5)
+    assert deliver_queued_mail(batch_size=2) == (5, 0)
+    assert len(opened) == 3, (
+        "Убедитесь, что письма одного пакета отправляются через одно"
+        " соединение с почтовым сервером."
+    )
+    assert deliver_queued_mail() == (0, 0)
+
+
+def test_failed_mail_retried_later(monkeypatch, settings):
+    monkeypatch.setattr(EmailBackend, 'send_messages', refuse)
+    queue(1)
+    assert deliver_queued_mail() == (0, 1)
+    email = OutboundEmail.objects.get()
+    assert email.attempts == 1
+    assert 'SMTP недоступен' in email.last_error
+    assert email.next_attempt_at > timezone.now(), (
+        "Убедитесь, что повторная попытка отправки откладывается."
+    )
+    assert deliver_queued_mail() == (0, 0)
+
+    monkeypatch.undo()
+    email.next_attempt_at = timezone.now() - timedelta(seconds=1)
+    email.save()
+    assert deliver_queued_mail() == (1, 0)
+
+
+def test_attempts_are_limited(monkeypatch, settings):
+    settings.BLOG_MAIL_RETRY_DELAY = 0
+    monkeypatch.setattr(EmailBackend, 'send_messages', refuse)
+    queue(1)
+    for _ in range(settings.BLOG_MAIL_MAX_ATTEMPTS + 2):
+        deliver_queued_mail()
+    assert OutboundEmail.objects.get().attempts == (
+        settings.BLOG_MAIL_MAX_ATTEMPTS
+    )
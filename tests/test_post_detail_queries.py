@@ -0,0 +1,55 @@
+import pytest
+from django.test import Client
+
+pytestmark = [pytest.mark.django_db]
+
+# ETag, пост со связанными объектами, комментарии с авторами.
+ANONYMOUS_QUERIES = 3
+# Плюс сессия и пользователь.
+AUTHENTICATED_QUERIES = ANONYMOUS_QUERIES + 2
+
+
+@pytest.fixture
+def commented_post(mixer, another_user, post_with_published_location):
+    mixer.cycle(5).blend(
+        'blog.Comment', post=post_with_published_location, author=another_user
+    )
+    return post_with_published_location
+
+
+@pytest.mark.parametrize(
+    ('client_fixture', 'expected'),
+    [
+        ('unlogged_client', ANONYMOUS_QUERIES),
+        ('user_client', AUTHENTICATED_QUERIES),
+        ('another_user_client', AUTHENTICATED_QUERIES),
+    ],
+    ids=['anonymous', 'author', 'not author'],
+)
+def test_post_detail_query_count(
+        request, client_fixture, expected, commented_post,
+        django_assert_num_queries
+):
+    client: Client = request.getfixturevalue(client_fixture)
+    with django_assert_num_queries(expected):
+        response = client.get(f'/posts/{commented_post.id}/')
+    assert response.status_code == 200
+
+
+def test_author_sees_unpublished_post_in_same_queries(
+        user_client, commented_post, django_assert_num_queries
+):
+    commented_post.is_published = False
+    commented_post.save()
+    with django_assert_num_queries(AUTHENTICATED_QUERIES):
+        response = user_client.get(f'/posts/{commented_post.id}/')
+    assert response.status_code == 200
+
+
+def test_hidden_post_is_404_for_others(
+        another_user_client, commented_post
+):
+    commented_post.is_published = False
+    commented_post.save()
+    response = another_user_client.get(f'/posts/{commented_post.id}/')
+    assert response.status_code == 404
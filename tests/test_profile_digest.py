@@ -0,0 +1,111 @@
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.db import DatabaseError
+
+from blog.digest import flush_buffer, record_profile_change, send_digests
+from blog.models import OutboundEmail, ProfileChangeEvent
+
+pytestmark = [pytest.mark.django_db]
+
+
+def edit_profile(client, user, first_name):
+    return client.post('/profile/edit/', {
+        'username': user.username,
+        'first_name': first_name,
+        'last_name': user.last_name,
+        'email': user.email or 'user@post.not',
+    })
+
+
+def test_profile_edits_coalesced_into_digest(
+        settings, user, another_user, user_client, another_user_client
+):
+    settings.BLOG_PROFILE_DIGEST_RECIPIENTS = [
+        'admin@post.not', 'moderator@post.not'
+    ]
+    for number in range(3):
+        response = edit_profile(user_client, user, f'Имя {number}')
+        assert response.status_code == 302
+    edit_profile(another_user_client, another_user, 'Другое имя')
+    assert mail.outbox == []
+    assert not OutboundEmail.objects.exists(), (
+        "Убедитесь, что изменение профиля не создаёт письмо на каждое"
+        " изменение."
+    )
+
+    call_command('send_profile_digest', stdout=StringIO())
+    call_command('send_queued_mail', stdout=StringIO())
+    assert sorted(message.to[0] for message in mail.outbox) == [
+        'admin@post.not', 'moderator@post.not'
+    ], "Убедитесь, что каждый получатель получает одну сводку."
+    body = mail.outbox[0].body
+    assert 'Изменений профилей: 4' in body
+    assert f'{user.username}: 3' in body
+    assert f'{another_user.username}: 1' in body
+    assert not ProfileChangeEvent.objects.exists()
+    assert send_digests() == 0
+
+
+def test_buffer_is_bounded(settings, user):
+    settings.BLOG_DIGEST_BUFFER_SIZE = 3
+    for _ in range(2):
+        record_profile_change(user)
+    assert not ProfileChangeEvent.objects.exists()
+    record_profile_change(user)
+    assert ProfileChangeEvent.objects.count() == 3, (
+        "Убедитесь, что заполненный буфер событий сбрасывается в базу."
+    )
+    assert flush_buffer() == 0
+
+
+def test_stale_buffer_flushed_after_request(settings, user, client):
+    settings.BLOG_DIGEST_BUFFER_SIZE = 100
+    record_profile_change(user)
+    assert not ProfileChangeEvent.objects.exists()
+    settings.BLOG_DIGEST_BUFFER_SECONDS = 0
+    client.get('/pages/about/')
+    assert ProfileChangeEvent.objects.count() == 1, (
+        "Убедитесь, что устаревшие события сохраняются в базу по окончании"
+        " запроса."
+    )
+
+
+def fail_inserts(monkeypatch):
+    def bulk_create(*args, **kwargs):
+        raise DatabaseError('database is locked')
+
+    monkeypatch.setattr(ProfileChangeEvent.objects, 'bulk_create', bulk_create)
+
+
+def test_failed_flush_keeps_events(settings, user, user_client, monkeypatch):
+    settings.BLOG_DIGEST_BUFFER_SIZE = 2
+    fail_inserts(monkeypatch)
+    record_profile_change(user)
+    response = edit_profile(user_client, user, 'Новое имя')
+    assert response.status_code == 302, (
+        "Убедитесь, что ошибка записи событий в базу не приводит к ошибке"
+        " сервера при редактировании профиля."
+    )
+    assert flush_buffer() == 0
+    monkeypatch.undo()
+    assert not ProfileChangeEvent.objects.exists()
+    assert flush_buffer() == 2, (
+        "Убедитесь, что события, которые не удалось сохранить, остаются в"
+        " буфере до следующего сброса."
+    )
+    assert ProfileChangeEvent.objects.count() == 2
+
+
+def test_failed_flush_buffer_is_capped(settings, user, monkeypatch):
+    settings.BLOG_DIGEST_BUFFER_SIZE = 3
+    fail_inserts(monkeypatch)
+    for _ in range(5):
+        record_profile_change(user)
+    monkeypatch.undo()
+    assert flush_buffer() == 3, (
+        "Убедитесь, что несохранённые события хранятся в буфере не больше"
+        " BLOG_DIGEST_BUFFER_SIZE."
+    )
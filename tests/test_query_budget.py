@@ -0,0 +1,138 @@
+"""Бюджет SQL-запросов для каждого адреса приложений blog и pages.
+
+Число запросов не должно зависеть ни от числа постов на странице, ни от
+числа комментариев: каждый адрес проверяется на маленьком и на большом
+наборе данных с одним и тем же бюджетом. Запросы считаются для
+авторизованного пользователя при пустом кэше; первые два запроса любой
+страницы — сессия и пользователь.
+"""
+import pytest
+from django.core.cache import cache
+from django.urls import get_resolver
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+AUTH = 2
+
+BUDGETS = {
+    # Отложенные публикации для ETag, количество, страница постов.
+    'blog:index': AUTH + 3,
+    # ETag, пост со связанными объектами, комментарии с авторами.
+    'blog:post_detail': AUTH + 3,
+    # Как пост: ETag, пост, порция комментариев с авторами.
+    'blog:post_comments': AUTH + 3,
+    # Как главная плюс категория для заголовка.
+    'blog:category_posts': AUTH + 4,
+    # Как главная плюс пользователь для заголовка профиля.
+    'blog:profile': AUTH + 4,
+    'blog:edit_profile': AUTH,
+    # Количество найденных, страница результатов, посты со связями.
+    'blog:search': AUTH + 3,
+    # Без сессии. Индексы подсказок авторов, категорий и мест строятся
+    # при пустом кэше, по запросу на вид; дальше — без запросов к базе.
+    'blog:suggest': 3,
+    # JSON API. Ленты: отложенные публикации для ETag и страница, для
+    # категории и профиля — плюс проверка их существования. Пост: ETag,
+    # пост, страница комментариев с авторами.
+    'blog:api_index': AUTH + 2,
+    'blog:api_category_posts': AUTH + 3,
+    'blog:api_profile': AUTH + 3,
+    'blog:api_post_detail': AUTH + 3,
+    'blog:api_post_comments': AUTH + 3,
+    'blog:create_post': AUTH + 2,
+    # Пост проверяется в dispatch, в test_func и загружается UpdateView;
+    # плюс категории и местоположения для выпадающих списков формы.
+    'blog:edit_post': AUTH + 5,
+    # Пост в test_func, в DeleteView и для формы; варианты формы.
+    'blog:delete_post': AUTH + 4,
+    # Пост, вставка, счётчик, ленты для сброса кэша (POST).
+    'blog:add_comment': AUTH + 4,
+    # Комментарий в test_func и в UpdateView/DeleteView.
+    'blog:edit_comment': AUTH + 2,
+    'blog:delete_comment': AUTH + 2,
+    'pages:about': AUTH,
+    'pages:rules': AUTH,
+}
+
+POST_REQUESTS = {'blog:add_comment': {'text': 'Комментарий'}}
+
+
+def url_names(namespace):
+    resolver = get_resolver().namespace_dict[namespace][1]
+    return {
+        f'{namespace}:{pattern.name}' for pattern in resolver.url_patterns
+    }
+
+
+def test_every_url_has_budget():
+    missing = (url_names('blog') | url_names('pages')) - set(BUDGETS)
+    assert not missing, (
+        f"Задайте бюджет запросов для адресов: {sorted(missing)}."
+    )
+
+
+@pytest.fixture(params=['small', 'large'])
+def dataset(request, mixer, user, another_user):
+    size = 1 if request.param == 'small' else N_PER_PAGE * 2
+    comments_per_post = 1 if request.param == 'small' else 5
+    categories = mixer.cycle(3).blend('blog.Category', is_published=True)
+    locations = mixer.cycle(3).blend('blog.Location', is_published=True)
+    posts = mixer.cycle(size).blend(
+        'blog.Post',
+        author=user,
+        title='Запрос',
+        is_published=True,
+        category=categories[0],
+        location=mixer.sequence(*locations),
+    )
+    for post in posts:
+        mixer.cycle(comments_per_post).blend(
+            'blog.Comment',
+            post=post,
+            author=mixer.sequence(user, another_user),
+        )
+    post = posts[0]
+    comment = post.comments.filter(author=user).first()
+    return {
+        'blog:index': '/',
+        'blog:post_detail': f'/posts/{post.id}/',
+        'blog:post_comments': f'/posts/{post.id}/comments/',
+        'blog:category_posts': f'/category/{post.category.slug}/',
+        'blog:profile': f'/profile/{user.username}/',
+        'blog:edit_profile': '/profile/edit/',
+        'blog:search': '/search/?q=запрос',
+        'blog:suggest': f'/suggest/?q={user.username[:3]}',
+        'blog:api_index': '/api/posts/',
+        'blog:api_category_posts': f'/api/category/{post.category.slug}/',
+        'blog:api_profile': f'/api/profile/{user.username}/',
+        'blog:api_post_detail': f'/api/posts/{post.id}/',
+        'blog:api_post_comments': f'/api/posts/{post.id}/comments/',
+        'blog:create_post': '/posts/create/',
+        'blog:edit_post': f'/posts/{post.id}/edit/',
+        'blog:delete_post': f'/posts/{post.id}/delete/',
+        'blog:add_comment': f'/posts/{post.id}/comment/',
+        'blog:edit_comment': f'/posts/{post.id}/edit_comment/{comment.id}/',
+        'blog:delete_comment': (
+            f'/posts/{post.id}/delete_comment/{comment.id}/'
+        ),
+        'pages:about': '/pages/about/',
+        'pages:rules': '/pages/rules/',
+    }
+
+
+@pytest.mark.parametrize('url_name', sorted(BUDGETS))
+def test_query_budget(
+        url_name, dataset, user_client, django_assert_num_queries
+):
+    url = dataset[url_name]
+    cache.clear()
+    with django_assert_num_queries(BUDGETS[url_name]):
+        if url_name in POST_REQUESTS:
+            response = user_client.post(url, POST_REQUESTS[url_name])
+        else:
+            response = user_client.get(url)
+    assert response.status_code in (200, 302), (
+        f"Убедитесь, что страница `{url}` загружается без ошибок."
+    )
@@ -0,0 +1,83 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test import RequestFactory
+
+from blog.models import Comment
+from blog.views import (
+    CategoryPostsListView, PostListView, UserProfileListView
+)
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != 'sqlite', reason='EXPLAIN QUERY PLAN из SQLite'
+    ),
+]
+
+
+def explain(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def feed_queryset(view_class, user=None, **kwargs):
+    request = RequestFactory().get('/')
+    request.user = user or AnonymousUser()
+    view = view_class()
+    view.setup(request, **kwargs)
+    return view.get_queryset()
+
+
+def assert_uses_index(plan, table, index_name):
+    assert any(
+        step.startswith(f'SEARCH {table} USING INDEX {index_name}')
+        for step in plan
+    ), (
+        f"Убедитесь, что запрос к `{table}` использует индекс"
+        f" `{index_name}`. План запроса: {plan}"
+    )
+    assert not any(step.startswith(f'SCAN {table}') for step in plan), (
+        f"Убедитесь, что запрос не сканирует `{table}` целиком. План"
+        f" запроса: {plan}"
+    )
+    assert not any('TEMP B-TREE' in step for step in plan), (
+        "Убедитесь, что сортировка выполняется по индексу, а не во временном"
+        f" B-дереве. План запроса: {plan}"
+    )
+
+
+def test_index_feed_plan(post_with_published_location):
+    plan = explain(feed_queryset(PostListView)[:10])
+    assert_uses_index(plan, 'blog_post', 'post_published_pub_date_idx')
+
+
+def test_category_feed_plan(post_with_published_location):
+    slug = post_with_published_location.category.slug
+    plan = explain(
+        feed_queryset(CategoryPostsListView, category_slug=slug)[:10]
+    )
+    assert_uses_index(plan, 'blog_post', 'post_category_pub_date_idx')
+
+
+def test_profile_feed_plan(user, post_with_published_location):
+    plan = explain(
+        feed_queryset(UserProfileListView, username=user.username)[:10]
+    )
+    assert_uses_index(plan, 'blog_post', 'post_author_pub_date_idx')
+
+    own_plan = explain(
+        feed_queryset(UserProfileListView, user, username=user.username)[:10]
+    )
+    assert_uses_index(own_plan, 'blog_post', 'post_author_pub_date_idx')
+
+
+def test_post_comments_plan(comment_to_a_post):
+    plan = explain(
+        Comment.objects.filter(
+            post_id=comment_to_a_post.post_id, is_published=True
+        ).select_related('author').order_by('created_at', 'id')[:10]
+    )
+    assert_uses_index(plan, 'blog_comment', 'comment_published_post_idx')
@@ -0,0 +1,102 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connections
+
+from blog.db import copy_sqlite_database
+from blog.routers import PIN_COOKIE
+
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+ALIAS = 'replica_test'
+
+
+@pytest.fixture
+def sync_replica(settings, tmp_path):
+    """Реплика — отдельный файл SQLite; вызов фикстуры копирует в неё
+    основную базу.
+    """
+    connections.databases[ALIAS] = {
+        **connections.databases['default'],
+        'NAME': str(tmp_path / 'replica.sqlite3'),
+        'TEST': {},
+    }
+    settings.DATABASE_REPLICAS = [ALIAS]
+    yield lambda: copy_sqlite_database(
+        connections['default'], connections[ALIAS]
+    )
+    connections[ALIAS].close()
+    del connections[ALIAS]
+    del connections.databases[ALIAS]
+
+
+def edit_on_primary(post, title):
+    post.title = title
+    post.save()
+
+
+def test_feeds_and_anonymous_detail_read_replica(
+        client, sync_replica, post_with_published_location
+):
+    post = post_with_published_location
+    title = post.title
+    sync_replica()
+    edit_on_primary(post, 'Заголовок только в основной базе')
+    for url in ('/', f'/posts/{post.id}/', f'/profile/{post.author}/'):
+        content = client.get(url).content.decode()
+        assert title in content, (
+            f"Убедитесь, что страница `{url}` для анонимного посетителя"
+            " читает посты с реплики."
+        )
+
+
+def test_author_detail_reads_primary(
+        user_client, sync_replica, post_with_published_location
+):
+    post = post_with_published_location
+    sync_replica()
+    edit_on_primary(post, 'Заголовок только в основной базе')
+    response = user_client.get(f'/posts/{post.id}/')
+    assert 'Заголовок только в основной базе' in response.content.decode()
+
+
+def test_write_pins_primary(
+        user_client, sync_replica, post_with_published_location
+):
+    post = post_with_published_location
+    sync_replica()
+    response = user_client.post(
+        f'/posts/{post.id}/comment/', {'text': 'Свежий комментарий'}
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    assert PIN_COOKIE in response.cookies, (
+        "Убедитесь, что после записи пользователь закрепляется за основной"
+        " базой."
+    )
+    response = user_client.get(f'/profile/{post.author}/')
+    assert 'Комментарии (1)' in response.content.decode(), (
+        "Убедитесь, что после записи автор видит свои изменения, даже если"
+        " реплика ещё не обновилась."
+    )
+
+
+def test_lagging_replica_pages_not_cached(
+        client, sync_replica, post_with_published_location
+):
+    post = post_with_published_location
+    sync_replica()
+    edit_on_primary(post, 'Заголовок после синхронизации')
+    urls = ('/', f'/posts/{post.id}/', f'/api/posts/{post.id}/')
+    for url in urls:
+        response = client.get(url)
+        assert not response.has_header('ETag'), (
+            f"Убедитесь, что страница `{url}`, прочитанная с реплики сразу"
+            " после изменения, не получает ETag новой версии."
+        )
+    sync_replica()
+    for url in urls:
+        content = client.get(url).getvalue().decode()
+        assert 'Заголовок после синхронизации' in content, (
+            f"Убедитесь, что страница `{url}`, собранная по отстающей"
+            " реплике, не попадает в кэш страниц."
+        )
@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from django.utils.cache import get_max_age
+
+from blog.cache import INDEX_SCOPE, author_scope, category_scope
+from blog.schedule import feed_ttl, next_publication
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def scheduled_post(mixer, another_user, another_category):
+    return mixer.blend(
+        'blog.Post',
+        author=another_user,
+        is_published=True,
+        category=another_category,
+        pub_date=timezone.now() + timedelta(seconds=30),
+    )
+
+
+def test_next_publication_per_scope(
+        user, published_category, scheduled_post,
+        post_with_published_location
+):
+    assert next_publication(INDEX_SCOPE) == scheduled_post.pub_date
+    assert next_publication(
+        category_scope(scheduled_post.category.slug)
+    ) == scheduled_post.pub_date
+    assert next_publication(
+        author_scope(scheduled_post.author.username)
+    ) == scheduled_post.pub_date
+    assert next_publication(category_scope(published_category.slug)) is None
+    assert next_publication(author_scope(user.username)) is None, (
+        "Убедитесь, что отложенная публикация учитывается только в лентах,"
+        " где пост появится."
+    )
+
+
+def test_next_publication_follows_changes(scheduled_post):
+    assert next_publication(INDEX_SCOPE) == scheduled_post.pub_date
+    scheduled_post.is_published = False
+    scheduled_post.save()
+    assert next_publication(INDEX_SCOPE) is None, (
+        "Убедитесь, что снятие отложенного поста с публикации сбрасывает"
+        " запомненный момент публикации."
+    )
+
+
+def test_feed_ttl_bounded(scheduled_post):
+    assert feed_ttl(INDEX_SCOPE, 600) <= 30
+    assert feed_ttl(INDEX_SCOPE, 10) == 10
+
+
+def test_http_expiry_headers(client, scheduled_post):
+    response = client.get('/')
+    assert response.has_header('Expires')
+    assert 0 < get_max_age(response) <= 30, (
+        "Убедитесь, что max-age страницы ленты не превышает времени до"
+        " отложенной публикации."
+    )
+    assert 'Cookie' in response['Vary']
@@ -0,0 +1,124 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def make_post(mixer, user, published_category):
+    def make(title, text, **kwargs):
+        fields = {
+            'author': user,
+            'category': published_category,
+            'is_published': True,
+            'pub_date': timezone.now() - timedelta(days=1),
+            **kwargs,
+        }
+        return mixer.blend('blog.Post', title=title, text=text, **fields)
+    return make
+
+
+def search(client, query):
+    response = client.get('/search/', {'q': query})
+    assert response.status_code == 200, (
+        "Убедитесь, что страница поиска загружается без ошибок."
+    )
+    return response
+
+
+def found_ids(response):
+    return [post.id for post in response.context['page_obj']]
+
+
+def test_title_match_ranked_first(client, make_post):
+    in_text = make_post('Прогулка', 'Весь день катались на велосипеде.')
+    in_title = make_post('Новый велосипед', 'Купили вчера.')
+    make_post('Рецепт', 'Ничего общего.')
+    assert found_ids(search(client, 'велосип')) == [in_title.id, in_text.id], (
+        "Убедитесь, что последнее слово ищется по началу, а совпадения"
+        " в заголовке ранжируются выше."
+    )
+    assert found_ids(search(client, 'катались велосип')) == [in_text.id], (
+        "Убедитесь, что найденные посты содержат все слова запроса."
+    )
+
+
+def test_hidden_posts_not_found(
+        client, make_post, mixer, published_category
+):
+    hidden_category = mixer.blend('blog.Category', is_published=False)
+    visible = make_post('Маяк', 'Текст')
+    make_post('Маяк снят', 'Текст', is_published=False)
+    make_post('Маяк скрыт', 'Текст', category=hidden_category)
+    make_post(
+        'Маяк позже', 'Текст', pub_date=timezone.now() + timedelta(days=1)
+    )
+    assert found_ids(search(client, 'маяк')) == [visible.id], (
+        "Убедитесь, что поиск соблюдает те же правила видимости, что ленты."
+    )
+
+
+def test_index_follows_updates_and_deletes(client, make_post):
+    post = make_post('Старый заголовок', 'Текст')
+    Post.objects.filter(pk=post.pk).update(title='Свежий заголовок')
+    assert found_ids(search(client, 'старый')) == []
+    assert found_ids(search(client, 'свежий')) == [post.id]
+    post.delete()
+    assert found_ids(search(client, 'свежий')) == []
+    call_command('rebuild_search_index', check=True, stdout=StringIO())
+
+
+def test_snippet_highlighted_and_escaped(client, make_post):
+    make_post('Заметка', 'Вставка <script>alert(1)</script> и слово гроза.')
+    content = search(client, 'гроза').content.decode()
+    assert '<mark>гроза</mark>' in content
+    assert '<script>alert' not in content, (
+        "Убедитесь, что текст поста в результатах поиска экранирован."
+    )
+
+
+@pytest.mark.parametrize('query', ['"OR (', 'NEAR(*', '', '   '])
+def test_query_syntax_not_interpreted(client, make_post, query):
+    make_post('Заметка', 'Текст')
+    assert found_ids(search(client, query)) == []
+
+
+def test_pagination_keeps_query(client, make_post):
+    for number in range(12):
+        make_post(f'Комета {number}', 'Текст')
+    response = search(client, 'комета')
+    assert response.context['paginator'].count == 12
+    assert '?q=%D0%BA%D0%BE%D0%BC%D0%B5%D1%82%D0%B0&amp;page=2' in (
+        response.content.decode()
+    )
+
+
+def test_rebuild_command(make_post):
+    posts = [make_post(f'Пост {number}', 'Текст') for number in range(5)]
+    stdout, stderr = StringIO(), StringIO()
+    call_command(
+        'rebuild_search_index', chunk_size=2, stdout=stdout, stderr=stderr
+    )
+    assert f'Проиндексировано постов: {len(posts)}' in stdout.getvalue()
+    assert stderr.getvalue().count('Проиндексировано') == 3
+    call_command('rebuild_search_index', check=True, stdout=stdout)
+    assert 'Индекс в порядке' in stdout.getvalue()
+
+
+def test_fallback_without_fts(client, make_post, monkeypatch):
+    monkeypatch.setattr('blog.search.fts_available', lambda using: False)
+    post = make_post('Гроза над рекой', 'Текст про <b>грозу</b>.')
+    make_post('Рецепт', 'Ничего общего.')
+    response = search(client, 'гроз')
+    assert found_ids(response) == [post.id], (
+        "Убедитесь, что без FTS5 поиск работает через icontains."
+    )
+    content = response.content.decode()
+    assert '<mark>Гроза</mark>' in content
+    assert '&lt;b&gt;<mark>грозу</mark>&lt;/b&gt;' in content
@@ -0,0 +1,73 @@
+import pytest
+from django.core.signals import request_started
+from django.db import connection
+from django.test import override_settings
+
+from blog.db import (
+    apply_sqlite_pragmas, connection_metrics, reset_connection_metrics
+)
+
+pytestmark = [pytest.mark.django_db]
+
+
+def pragma(name):
+    with connection.cursor() as cursor:
+        return cursor.execute(f'PRAGMA {name}').fetchone()[0]
+
+
+def test_connection_uses_configured_pragmas(settings):
+    assert pragma('synchronous') == 1, (
+        "Убедитесь, что соединение с SQLite открывается с synchronous=NORMAL."
+    )
+    assert pragma('busy_timeout') == settings.SQLITE_PRAGMAS['busy_timeout']
+    assert pragma('cache_size') == settings.SQLITE_PRAGMAS['cache_size']
+
+
+def test_wal_enabled_for_file_database(tmp_path):
+    with override_settings(SQLITE_PRAGMAS={'journal_mode': 'WAL'}):
+        wrapper = connection.copy()
+        wrapper.settings_dict = {
+            **connection.settings_dict, 'NAME': str(tmp_path / 'db.sqlite3')
+        }
+        try:
+            with wrapper.cursor() as cursor:
+                mode = cursor.execute('PRAGMA journal_mode').fetchone()[0]
+        finally:
+            wrapper.close()
+    assert mode == 'wal'
+
+
+def test_other_vendors_untouched():
+    class Connection:
+        vendor = 'postgresql'
+
+        def cursor(self):
+            raise AssertionError('Прагмы применяются только к SQLite.')
+
+    apply_sqlite_pragmas(sender=None, connection=Connection())
+
+
+@pytest.mark.django_db(transaction=True)
+def test_broken_connection_closed_before_request(monkeypatch):
+    connection.ensure_connection()
+    reset_connection_metrics()
+    request_started.send(sender=None)
+    assert connection_metrics()['reused'] == 1
+
+    closed = []
+    monkeypatch.setattr(connection, 'is_usable', lambda: False)
+    # Тестовая база в памяти: Django не закрывает её по-настоящему.
+    monkeypatch.setattr(connection, 'close', lambda: closed.append(True))
+    request_started.send(sender=None)
+    assert closed, (
+        "Убедитесь, что неработоспособное соединение закрывается в начале"
+        " запроса."
+    )
+    assert connection_metrics()['health_check_failures'] == 1
+
+
+def test_conn_max_age_configured(settings):
+    assert (
+        connection.settings_dict['CONN_MAX_AGE']
+        == settings.DATABASE_CONN_MAX_AGE
+    )
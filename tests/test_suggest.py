@@ -0,0 +1,109 @@
+import pytest
+
+from blog import suggest as suggest_module
+from blog.cache import invalidate_scopes
+from blog.suggest import get_index, suggest
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def authors(django_user_model):
+    return [
+        django_user_model.objects.create(username=username)
+        for username in ('victor_ivanov', 'maria', 'viktoria')
+    ]
+
+
+def labels(results):
+    return [result['label'] for result in results]
+
+
+def test_typo_and_prefix(client, authors):
+    response = client.get('/suggest/', {'q': 'victr_ivanov'})
+    assert response.status_code == 200
+    results = response.json()['results']
+    assert results[0]['label'] == 'victor_ivanov', (
+        "Убедитесь, что подсказки находят автора при опечатке."
+    )
+    assert results[0]['url'] == '/profile/victor_ivanov/'
+    assert labels(suggest('vic', ['author']))[0] == 'victor_ivanov', (
+        "Убедитесь, что подсказки находят автора по началу имени."
+    )
+
+
+def test_kind_filter(client, authors, mixer):
+    mixer.blend('blog.Category', title='Mariachi', slug='mariachi',
+                is_published=True)
+    response = client.get('/suggest/', {'q': 'mari', 'kind': 'category'})
+    assert labels(response.json()['results']) == ['Mariachi']
+
+
+def test_index_updated_incrementally(
+        authors, mixer, django_assert_num_queries
+):
+    category = mixer.blend('blog.Category', title='Путешествия',
+                           slug='travel', is_published=False)
+    assert labels(suggest('путешест')) == []
+    category.is_published = True
+    category.save()
+    user = authors[1]
+    user.username = 'marina'
+    user.save()
+    with django_assert_num_queries(0):
+        assert labels(suggest('путешест', ['category'])) == ['Путешествия']
+        assert labels(suggest('marin', ['author'])) == ['marina']
+    user.delete()
+    assert labels(suggest('marin', ['author'])) == []
+
+
+def test_rebuilt_after_change_elsewhere(authors, django_assert_num_queries):
+    index = get_index('author')
+    invalidate_scopes('suggest:author')
+    with django_assert_num_queries(1):
+        assert get_index('author') is not index
+
+
+def test_change_elsewhere_replayed(
+        authors, monkeypatch, django_assert_num_queries
+):
+    index = get_index('author')
+    with monkeypatch.context() as patch:
+        # Индекса нет: изменение как будто сделано в другом процессе.
+        patch.setattr(suggest_module, '_indexes', {})
+        authors[1].username = 'marina'
+        authors[1].save()
+        authors[2].delete()
+    with django_assert_num_queries(0):
+        assert get_index('author') is index, (
+            "Убедитесь, что индекс другого процесса применяет изменения"
+            " из кэша, а не перестраивается."
+        )
+        assert labels(suggest('marin', ['author'])) == ['marina']
+        assert labels(suggest('viktoria', ['author'])) == []
+
+
+def test_not_found_page_never_builds_index(client, authors, monkeypatch):
+    monkeypatch.setattr(suggest_module, '_indexes', {})
+    response = client.get('/profile/victr_ivanov/')
+    assert response.status_code == 404
+    assert 'author' not in suggest_module._indexes, (
+        "Убедитесь, что страница 404 не строит индекс подсказок."
+    )
+
+
+def test_not_found_suggestions(client, authors, mixer):
+    mixer.blend('blog.Category', title='Путешествия', slug='travel',
+                is_published=True)
+    # Страница 404 пользуется только уже построенными индексами.
+    get_index('author')
+    get_index('category')
+    content = client.get('/profile/victr_ivanov/').content.decode()
+    assert 'href="/profile/victor_ivanov/"' in content, (
+        "Убедитесь, что страница 404 профиля предлагает похожих авторов."
+    )
+    content = client.get('/category/travle/').content.decode()
+    assert 'href="/category/travel/"' in content
+    response = client.get('/catgory/travel/')
+    assert response.status_code == 404
+    assert 'href="/category/travel/"' in response.content.decode()